@@ -4,13 +4,29 @@ Seed Corpus Generator for RAG-Shield
 Generates clean documents and attack scenario samples
 """
 
-import json
-import uuid
+import os
+import sys
+import time
 import random
 import hashlib
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import List, Dict
+from collections import Counter
+from datetime import datetime
+from typing import List, Dict, Iterator
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output needs pyarrow; JSONL works without it
+    pa = pq = None
+
+try:
+    from ..jsonio import dump_line, dump_pretty
+except ImportError:  # executed as a standalone script; append so nothing is shadowed
+    sys.path.append(str(Path(__file__).resolve().parents[3]))
+    from src.rag.jsonio import dump_line, dump_pretty
 
 # Attack templates for each scenario
 ATTACK_TEMPLATES = {
@@ -66,6 +82,42 @@ ATTACK_TEMPLATES = {
     ]
 }
 
+# Payload hashes depend only on the template, so compute them once
+TEMPLATE_HASHES = {
+    template: hashlib.sha256(template.encode()).hexdigest()[:16]
+    for templates in ATTACK_TEMPLATES.values()
+    for template in templates
+}
+
+# Clean documents are sampled in batches of this size
+CLEAN_BATCH_SIZE = 1000
+
+# Output formats accepted by SeedGenerator.generate
+CORPUS_FORMATS = ("parquet", "jsonl")
+
+# Rows buffered per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 10000
+
+# Meta fields stored as top-level Parquet columns next to id, content and meta_type
+PARQUET_META_COLUMNS = ["topic", "attack_type", "created_at", "source", "signed",
+                        "experiment", "attack_index", "payload_hash"]
+
+DAY_SECONDS = 86400
+
+# Random bytes drawn per clean document: 16 for the ID, 4 for the reference
+ID_BYTES = 20
+
+# Large corpora are flushed in chunks of this size
+WRITE_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Legitimate-looking openers for attack documents
+LEGITIMATE_PREFIXES = [
+    "System configuration guide: ",
+    "Security policy update: ",
+    "Technical specification: ",
+    "Implementation notes: "
+]
+
 # Clean document topics for realistic corpus
 CLEAN_TOPICS = [
     "Machine learning model training best practices",
@@ -90,130 +142,234 @@ CLEAN_TOPICS = [
     "Security vulnerability assessment methodologies"
 ]
 
+
+def _write_all(f, buf: bytearray):
+    """Write a prepared buffer to an unbuffered file in as few syscalls as possible"""
+    with memoryview(buf) as view:
+        # Unbuffered writes may be partial, so loop until the chunk is flushed
+        for start in range(0, len(view), WRITE_CHUNK_SIZE):
+            chunk = view[start:start + WRITE_CHUNK_SIZE]
+            while chunk:
+                chunk = chunk[f.write(chunk):]
+
+
+def _parquet_schema():
+    """Columnar corpus schema with the document meta flattened"""
+    return pa.schema([
+        ("id", pa.string()),
+        ("content", pa.string()),
+        ("meta_type", pa.string()),
+        ("topic", pa.string()),
+        ("attack_type", pa.string()),
+        ("created_at", pa.string()),
+        ("source", pa.string()),
+        ("signed", pa.bool_()),
+        ("experiment", pa.string()),
+        ("attack_index", pa.int32()),
+        ("payload_hash", pa.string()),
+    ])
+
+
+def _flatten(doc: Dict) -> Dict:
+    """Flatten a document into a Parquet row"""
+    meta = doc["meta"]
+    row = {"id": doc["id"], "content": doc["content"], "meta_type": meta["type"]}
+    for column in PARQUET_META_COLUMNS:
+        row[column] = meta.get(column)
+    return row
+
+
 class SeedGenerator:
     """Generate seed corpus with clean and poisoned documents"""
     
     def __init__(self, output_dir: str = "src/rag/data/corpus"):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.documents = []
+        self.rng = np.random.default_rng()
     
     def generate_clean_document(self, index: int) -> Dict:
         """Generate a clean, realistic document"""
-        topic = random.choice(CLEAN_TOPICS)
-        timestamp = datetime.utcnow() - timedelta(days=random.randint(1, 365))
-        
-        content = f"{topic}. Document #{index}. "
-        content += f"Generated on {timestamp.strftime('%Y-%m-%d')}. "
-        content += "This document contains technical information for system administrators. "
-        content += f"Reference ID: CLEAN-{uuid.uuid4().hex[:8].upper()}. "
-        content += "For internal use only. Review and update quarterly."
+        return self.generate_clean_documents(1, start=index)[0]
+    
+    def generate_clean_documents(self, n: int, start: int = 0) -> List[Dict]:
+        """Generate a batch of clean documents numbered from start"""
+        # Sample every per-document field up front, then format in one pass
+        topics = [CLEAN_TOPICS[i] for i in self.rng.integers(0, len(CLEAN_TOPICS), n).tolist()]
+        # Integer epoch offsets of 1-365 days, formatted straight to ISO-8601 UTC
+        epochs = (int(time.time()) - self.rng.integers(DAY_SECONDS, 366 * DAY_SECONDS, n)).tolist()
+        created = [time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(t)) for t in epochs]
+        # One urandom call yields a 16-byte document ID and 4-byte reference per row
+        raw = os.urandom(ID_BYTES * n)
+        doc_ids = [raw[i:i + 16].hex() for i in range(0, len(raw), ID_BYTES)]
+        ref_ids = [raw[i + 16:i + ID_BYTES].hex().upper() for i in range(0, len(raw), ID_BYTES)]
         
-        doc = {
-            "id": str(uuid.uuid4()),
-            "content": content,
-            "meta": {
-                "type": "clean",
-                "topic": topic,
-                "created_at": timestamp.isoformat(),
-                "source": "internal-knowledge-base",
-                "signed": False,
-                "experiment": None
+        return [
+            {
+                "id": doc_id,
+                "content": (
+                    f"{topic}. Document #{index}. "
+                    f"Generated on {created_at[:10]}. "
+                    "This document contains technical information for system administrators. "
+                    f"Reference ID: CLEAN-{ref_id}. "
+                    "For internal use only. Review and update quarterly."
+                ),
+                "meta": {
+                    "type": "clean",
+                    "topic": topic,
+                    "created_at": created_at,
+                    "source": "internal-knowledge-base",
+                    "signed": False,
+                    "experiment": None
+                }
             }
-        }
-        return doc
+            for index, topic, created_at, doc_id, ref_id
+            in zip(range(start, start + n), topics, created, doc_ids, ref_ids)
+        ]
     
     def generate_attack_document(self, attack_type: str, index: int) -> Dict:
         """Generate a poisoned document for specific attack type"""
         template = random.choice(ATTACK_TEMPLATES[attack_type])
-        timestamp = datetime.utcnow()
+        created_at = datetime.utcnow().isoformat()
         
         # Add some legitimate-looking content to make it harder to detect
-        legitimate_prefix = random.choice([
-            "System configuration guide: ",
-            "Security policy update: ",
-            "Technical specification: ",
-            "Implementation notes: "
-        ])
+        legitimate_prefix = random.choice(LEGITIMATE_PREFIXES)
         
-        content = legitimate_prefix + template
-        content += f" Attack instance #{index}. "
-        content += f"Injected: {timestamp.isoformat()}. "
-        content += f"Attack vector: {attack_type}."
+        content = (
+            f"{legitimate_prefix}{template} Attack instance #{index}. "
+            f"Injected: {created_at}. Attack vector: {attack_type}."
+        )
         
         doc = {
-            "id": str(uuid.uuid4()),
+            "id": os.urandom(16).hex(),
             "content": content,
             "meta": {
                 "type": "poisoned",
                 "attack_type": attack_type,
-                "created_at": timestamp.isoformat(),
+                "created_at": created_at,
                 "source": "malicious-injection",
                 "signed": False,
                 "experiment": attack_type,
                 "attack_index": index,
-                "payload_hash": hashlib.sha256(template.encode()).hexdigest()[:16]
+                "payload_hash": TEMPLATE_HASHES[template]
             }
         }
         return doc
     
-    def generate(self, n_clean: int = 1000, per_scenario: int = 10) -> Path:
-        """Generate complete corpus with clean and attack documents"""
-        print(f"🔨 Generating corpus...")
-        print(f"   Clean documents: {n_clean}")
-        print(f"   Attack samples per scenario: {per_scenario}")
+    def iter_documents(self, n_clean: int = 1000, per_scenario: int = 10) -> Iterator[Dict]:
+        """Yield clean and attack documents in shuffled order
         
-        # Generate clean documents
-        for i in range(n_clean):
-            self.documents.append(self.generate_clean_document(i))
-            if (i + 1) % 100 == 0:
-                print(f"   Generated {i + 1}/{n_clean} clean documents...")
+        Attacks land anywhere in the corpus; clean documents are shuffled
+        within each batch of CLEAN_BATCH_SIZE so the corpus still streams.
+        """
+        # Attack samples are few, so shuffle them in memory and scatter them
+        # over random slots while the clean documents are streamed around them
+        attacks = [(attack_type, i) for attack_type in ATTACK_TEMPLATES for i in range(per_scenario)]
+        random.shuffle(attacks)
+        total = n_clean + len(attacks)
+        slots = np.sort(self.rng.choice(total, len(attacks), replace=False)).tolist()
         
-        # Generate attack documents for each scenario
-        attack_count = 0
-        for attack_type in ATTACK_TEMPLATES.keys():
-            for i in range(per_scenario):
-                self.documents.append(self.generate_attack_document(attack_type, i))
-                attack_count += 1
+        clean = self._iter_clean_documents(n_clean)
+        position = 0
+        for slot, (attack_type, index) in zip(slots, attacks):
+            for _ in range(slot - position):
+                yield next(clean)
+            yield self.generate_attack_document(attack_type, index)
+            position = slot + 1
+        yield from clean
+    
+    def _iter_clean_documents(self, n_clean: int) -> Iterator[Dict]:
+        """Yield clean documents generated in batches, each batch shuffled"""
+        for start in range(0, n_clean, CLEAN_BATCH_SIZE):
+            batch = min(CLEAN_BATCH_SIZE, n_clean - start)
+            docs = self.generate_clean_documents(batch, start=start)
+            # Shuffling per batch keeps memory at one batch while streaming
+            for i in self.rng.permutation(batch).tolist():
+                yield docs[i]
+            print(f"   Generated {start + batch}/{n_clean} clean documents...")
+    
+    def generate(self, n_clean: int = 1000, per_scenario: int = 10, fmt: str = "parquet") -> Path:
+        """Generate complete corpus with clean and attack documents
+        
+        fmt selects "parquet" (columnar, needs pyarrow) or legacy "jsonl".
+        """
+        if fmt not in CORPUS_FORMATS:
+            raise ValueError(f"Unknown corpus format {fmt!r}; expected one of {CORPUS_FORMATS}")
         
-        print(f"   Generated {attack_count} attack documents")
+        print(f"🔨 Generating corpus...")
+        print(f"   Clean documents: {n_clean}")
+        print(f"   Attack samples per scenario: {per_scenario}")
         
-        # Shuffle to mix clean and poisoned
-        random.shuffle(self.documents)
+        if fmt == "parquet" and pq is None:
+            print("   pyarrow not installed, writing JSONL instead")
+            fmt = "jsonl"
         
-        # Write to JSONL file
-        output_file = self.output_dir / "corpus.jsonl"
-        with open(output_file, 'w') as f:
-            for doc in self.documents:
-                f.write(json.dumps(doc) + '\n')
+        # Stream documents straight to disk, keeping only running tallies
+        types = Counter()
+        attacks = Counter()
+        docs = self._tally(self.iter_documents(n_clean, per_scenario), types, attacks)
+        if fmt == "parquet":
+            output_file = self.output_dir / "corpus.parquet"
+            self._write_parquet(output_file, docs)
+        else:
+            output_file = self.output_dir / "corpus.jsonl"
+            self._write_jsonl(output_file, docs)
         
+        print(f"   Generated {types['poisoned']} attack documents")
         print(f"✅ Corpus written to: {output_file}")
-        print(f"   Total documents: {len(self.documents)}")
-        print(f"   Clean: {n_clean}")
-        print(f"   Poisoned: {attack_count}")
+        print(f"   Total documents: {sum(types.values())}")
+        print(f"   Clean: {types['clean']}")
+        print(f"   Poisoned: {types['poisoned']}")
         
         # Generate statistics
-        self._generate_statistics(output_file.parent / "corpus_stats.json")
+        self._generate_statistics(output_file.parent / "corpus_stats.json", types, attacks)
         
         return output_file
     
-    def _generate_statistics(self, output_file: Path):
-        """Generate corpus statistics"""
+    @staticmethod
+    def _tally(docs: Iterator[Dict], types: Counter, attacks: Counter) -> Iterator[Dict]:
+        """Pass documents through while counting types and attack types"""
+        for doc in docs:
+            meta = doc["meta"]
+            types[meta["type"]] += 1
+            attacks[meta.get("attack_type")] += 1
+            yield doc
+    
+    def _write_jsonl(self, output_file: Path, docs: Iterator[Dict]):
+        """Write documents as JSON lines"""
+        buf = bytearray()
+        with open(output_file, 'wb', buffering=0) as f:
+            for doc in docs:
+                buf += dump_line(doc)
+                if len(buf) >= WRITE_CHUNK_SIZE:
+                    _write_all(f, buf)
+                    buf.clear()
+            _write_all(f, buf)
+    
+    def _write_parquet(self, output_file: Path, docs: Iterator[Dict]):
+        """Write documents as a Parquet table, one row group per batch"""
+        schema = _parquet_schema()
+        rows = []
+        with pq.ParquetWriter(output_file, schema) as writer:
+            for doc in docs:
+                rows.append(_flatten(doc))
+                if len(rows) >= PARQUET_ROW_GROUP_SIZE:
+                    writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                    rows = []
+            if rows:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+    
+    def _generate_statistics(self, output_file: Path, types: Counter, attacks: Counter):
+        """Generate corpus statistics from running type tallies"""
         stats = {
-            "total_documents": len(self.documents),
-            "clean_documents": sum(1 for d in self.documents if d["meta"]["type"] == "clean"),
-            "poisoned_documents": sum(1 for d in self.documents if d["meta"]["type"] == "poisoned"),
-            "attack_types": {},
+            "total_documents": sum(types.values()),
+            "clean_documents": types["clean"],
+            "poisoned_documents": types["poisoned"],
+            "attack_types": {attack_type: attacks[attack_type] for attack_type in ATTACK_TEMPLATES},
             "generated_at": datetime.utcnow().isoformat()
         }
         
-        for attack_type in ATTACK_TEMPLATES.keys():
-            count = sum(1 for d in self.documents 
-                       if d["meta"].get("attack_type") == attack_type)
-            stats["attack_types"][attack_type] = count
-        
-        with open(output_file, 'w') as f:
-            json.dump(stats, f, indent=2)
+        with open(output_file, 'wb') as f:
+            f.write(dump_pretty(stats))
         
         print(f"📊 Statistics written to: {output_file}")
 
@@ -229,11 +385,14 @@ def main():
                        help='Number of attack samples per scenario (default: 10)')
     parser.add_argument('--output-dir', type=str, default='src/rag/data/corpus',
                        help='Output directory for corpus')
+    parser.add_argument('--jsonl', action='store_true',
+                       help='Write legacy corpus.jsonl instead of corpus.parquet')
     
     args = parser.parse_args()
     
     generator = SeedGenerator(output_dir=args.output_dir)
-    generator.generate(n_clean=args.n_clean, per_scenario=args.per_scenario)
+    generator.generate(n_clean=args.n_clean, per_scenario=args.per_scenario,
+                       fmt="jsonl" if args.jsonl else "parquet")
 
 
 if __name__ == "__main__":
@@ -4,10 +4,200 @@ LLM-Based Anomaly Detection for RAG-Shield
 Uses LLM to analyze documents for poisoning indicators
 """
 
+import sys
 import json
 import hashlib
-from typing import Dict, List, Tuple
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass, replace
+from math import log2
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import hyperscan
+except ImportError:  # fall back to the Aho-Corasick or substring scan
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:  # fall back to one substring check per pattern
+    ahocorasick = None
+
+try:
+    from ..jsonio import dump_line, dump_pretty
+except ImportError:  # executed as a standalone script; append so nothing is shadowed
+    sys.path.append(str(Path(__file__).resolve().parents[3]))
+    from src.rag.jsonio import dump_line, dump_pretty
+
+try:
+    from numba import njit
+except ImportError:  # score in the interpreter when numba isn't installed
+    def njit(func):
+        return func
+
+# Default number of analyses kept for documents that are seen again
+ANALYSIS_CACHE_SIZE = 50_000
+
+# Byte-value lookup tables for ASCII content, built from the str predicates
+_ASCII_UPPER = np.array([i < 128 and chr(i).isupper() for i in range(256)])
+_ASCII_SPECIAL = np.array([i < 128 and not chr(i).isalnum() and not chr(i).isspace()
+                           for i in range(256)])
+
+# Below this many characters numpy call overhead outweighs counting entropy in Python
+SMALL_TEXT_SIZE = 256
+
+# Zero-width characters reported by the anomaly flags
+_ZW_CHARS = frozenset("\u200b\u200c\u200d\ufeff")
+
+# Behavioral keywords found by the pattern scan: (keyword, group, case_sensitive).
+# The scan is case-insensitive, so case-sensitive hits are confirmed on the raw text
+BEHAVIOR_KEYWORDS = [
+    ("ACTIVATE_AFTER", "behavior_trigger", True),
+    ("TRIGGER_DATE", "behavior_trigger", True),
+    ("IF", "behavior_cond", True),
+    ("THEN", "behavior_cond", True),
+    ("AWS", "behavior_cloud", False),
+    ("AZURE", "behavior_cloud", False),
+    ("GCP", "behavior_cloud", False),
+]
+_BEHAVIOR_GROUP_SIZES = Counter(group for _, group, _ in BEHAVIOR_KEYWORDS)
+
+# Sources whose documents are treated as suspicious
+SUSPICIOUS_SOURCES = ["malicious", "unauthorized", "unknown", "external"]
+
+# Boolean document traits passed to _score as one bit field
+_FLAG_POISON_MARKER = 1
+_FLAG_EXPERIMENT = 2
+_FLAG_SUSPICIOUS_SOURCE = 4
+_FLAG_SIGNED = 8
+_FLAG_NON_ASCII = 16
+_FLAG_TIME_TRIGGER = 32
+_FLAG_CONDITIONAL = 64
+
+
+def _histogram_entropy(counts: np.ndarray, total: int) -> float:
+    """Shannon entropy of a symbol histogram"""
+    prob = counts[counts > 0] / total
+    return float(-(prob * np.log2(prob)).sum())
+
+
+@dataclass(slots=True)
+class Features:
+    """Content features read by the analyzers, extracted in one pass"""
+    pattern_ids: List[int]
+    length: int
+    uppercase_chars: int
+    special_chars: int
+    entropy: float
+    is_ascii: bool
+    has_zero_width: bool
+    has_time_trigger: bool
+    has_conditional: bool
+    cloud_refs: int
+
+
+# No on-disk cache: numba keys it to the importing module's name, so a file
+# imported under two names (src.rag... vs rag...) would load a foreign entry
+@njit
+def _score(category_matches, category_sizes, category_weights, length, uppercase_chars,
+           special_chars, entropy, cloud_refs, flags):
+    """Pattern, metadata, statistical and behavioral scores plus their weighted total"""
+    # Normalize matches per category by its pattern count and apply severity weight
+    pattern_score = 0.0
+    for i in range(category_matches.size):
+        category_score = min(category_matches[i] / category_sizes[i], 1.0) * category_weights[i]
+        pattern_score = max(pattern_score, category_score)
+    pattern_score = min(pattern_score, 1.0)
+    
+    # Metadata: explicit attack markers, suspicious sources, missing signatures
+    metadata_score = 0.0
+    if flags & _FLAG_POISON_MARKER:
+        metadata_score += 0.5
+    if flags & _FLAG_EXPERIMENT:
+        metadata_score += 0.3
+    if flags & _FLAG_SUSPICIOUS_SOURCE:
+        metadata_score += 0.4
+    if not flags & _FLAG_SIGNED:
+        metadata_score += 0.2
+    metadata_score = min(metadata_score, 1.0)
+    
+    # Statistics: length anomaly, uppercase ratio, special characters, entropy
+    statistical_score = 0.0
+    if length < 50:
+        statistical_score += 0.3
+    elif length > 2000:
+        statistical_score += 0.2
+    if length > 0:
+        if uppercase_chars / length > 0.5:
+            statistical_score += 0.4
+        if special_chars / length > 0.3:
+            statistical_score += 0.3
+        if entropy > 4.5:  # High entropy = random/encrypted
+            statistical_score += 0.2
+    statistical_score = min(statistical_score, 1.0)
+    
+    # Behavior: time triggers, conditional logic, obfuscation, multi-cloud references
+    behavioral_score = 0.0
+    if flags & _FLAG_TIME_TRIGGER:
+        behavioral_score += 0.5
+    if flags & _FLAG_CONDITIONAL:
+        behavioral_score += 0.3
+    if flags & _FLAG_NON_ASCII:
+        behavioral_score += 0.2
+    if cloud_refs > 1:
+        behavioral_score += 0.3
+    behavioral_score = min(behavioral_score, 1.0)
+    
+    # Weighted combination (similar to LLM attention mechanism)
+    total_score = (
+        pattern_score * 0.40 +      # Pattern matching
+        metadata_score * 0.25 +      # Metadata analysis
+        statistical_score * 0.20 +   # Statistical features
+        behavioral_score * 0.15      # Behavioral indicators
+    )
+    return pattern_score, metadata_score, statistical_score, behavioral_score, total_score
+
+
+@dataclass(frozen=True, slots=True)
+class AnalysisResult:
+    """
+    Score breakdown returned by analyze_document as its details
+    
+    Attributes hold the unrounded scores; to_dict() gives the exported form,
+    with scores rounded to 4 decimal places and lists for the label tuples.
+    """
+    total_score: float
+    pattern_score: float
+    metadata_score: float
+    statistical_score: float
+    behavioral_score: float
+    detected_patterns: Tuple[str, ...]
+    anomaly_flags: Tuple[str, ...]
+    timestamp: Optional[Union[str, float]] = None
+    
+    def to_dict(self) -> Dict:
+        """Details as a plain JSON-ready dict, scores rounded to 4 decimal places"""
+        return {
+            "total_score": round(self.total_score, 4),
+            "pattern_score": round(self.pattern_score, 4),
+            "metadata_score": round(self.metadata_score, 4),
+            "statistical_score": round(self.statistical_score, 4),
+            "behavioral_score": round(self.behavioral_score, 4),
+            "detected_patterns": list(self.detected_patterns),
+            "anomaly_flags": list(self.anomaly_flags),
+            "timestamp": self.timestamp
+        }
+
+
+def _collect_match(pattern_id: int, start: int, end: int, flags: int, context: array):
+    """Hyperscan match callback: record the pattern id and keep scanning"""
+    context.append(pattern_id)
 
 
 class LLMDetector:
@@ -51,17 +241,90 @@ class LLMDetector:
         "unicode_tricks": 5
     }
     
-    def __init__(self, threshold: float = 0.5):
+    def __init__(self, threshold: float = 0.5, cache_size: int = ANALYSIS_CACHE_SIZE,
+                 fast_mode: bool = False):
         """
         Initialize LLM detector
         
         Args:
             threshold: Detection threshold (0-1), default 0.5
+            cache_size: Analyses remembered for re-seen documents, 0 disables
+            fast_mode: Keep timestamps as epoch floats, formatted only on export
         """
         self.threshold = threshold
-        self.detection_log = []
+        self.cache_size = cache_size
+        self.fast_mode = fast_mode
+        self._cache = OrderedDict()
+        self.clear_detections()
+        
+        # Flatten ATTACK_PATTERNS into parallel arrays indexed by pattern id
+        self._categories = list(self.ATTACK_PATTERNS)
+        self._patterns = [p for patterns in self.ATTACK_PATTERNS.values() for p in patterns]
+        # Matching is case-insensitive: any hit on the raw text is also a hit
+        # on the uppercased text, so only the uppercase forms are needed
+        self._upper_patterns = [p.upper() for p in self._patterns]
+        # Behavioral keywords share the scan, with ids after the attack patterns
+        self._scan_words = self._upper_patterns + [kw.upper() for kw, _, _ in BEHAVIOR_KEYWORDS]
+        self._pattern_labels = [f"{category}:{pattern}"
+                                for category, patterns in self.ATTACK_PATTERNS.items()
+                                for pattern in patterns]
+        self._pattern_category = np.array(
+            [i for i, patterns in enumerate(self.ATTACK_PATTERNS.values()) for _ in patterns],
+            dtype=np.intp)
+        self._category_sizes = np.array([len(p) for p in self.ATTACK_PATTERNS.values()])
+        self._category_weights = np.array(
+            [self.SEVERITY_WEIGHTS.get(category, 5) / 10.0 for category in self._categories])
+        
+        self._hs_db = self._build_hyperscan_db() if hyperscan is not None else None
+        self._automaton = (self._build_automaton()
+                           if self._hs_db is None and ahocorasick is not None else None)
+    
+    def _build_hyperscan_db(self):
+        """Compile every attack pattern and behavioral keyword into one Hyperscan literal database"""
+        # Patterns match case-insensitively, so scan uppercased text for the
+        # uppercase forms; every byte is hex-escaped to keep them literal
+        expressions = [b"".join(b"\\x%02x" % byte for byte in pattern.encode("utf-8"))
+                       for pattern in self._scan_words]
+        db = hyperscan.Database()
+        db.compile(expressions=expressions,
+                   ids=list(range(len(expressions))),
+                   elements=len(expressions),
+                   flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions))
+        return db
     
-    def analyze_document(self, doc: Dict) -> Tuple[bool, float, Dict]:
+    def _build_automaton(self):
+        """Compile every attack pattern and behavioral keyword into one Aho-Corasick automaton"""
+        # Patterns match case-insensitively, so key them by their uppercase form
+        words = defaultdict(list)
+        for pattern_id, pattern in enumerate(self._scan_words):
+            words[pattern].append(pattern_id)
+        
+        automaton = ahocorasick.Automaton()
+        for word, pattern_ids in words.items():
+            automaton.add_word(word, tuple(pattern_ids))
+        automaton.make_automaton()
+        return automaton
+    
+    def _scan(self, content: str, content_upper: Optional[str] = None) -> List[int]:
+        """Ids of the scan words present in content, in declaration order"""
+        if content_upper is None:
+            content_upper = content.upper()
+        if self._hs_db is not None:
+            matched = array('I')
+            self._hs_db.scan(content_upper.encode("utf-8", "surrogatepass"),
+                             match_event_handler=_collect_match, context=matched)
+            return sorted(set(matched))
+        
+        if self._automaton is not None:
+            found = set()
+            for _, pattern_ids in self._automaton.iter(content_upper):
+                found.update(pattern_ids)
+            return sorted(found)
+        
+        return [pattern_id for pattern_id, pattern in enumerate(self._scan_words)
+                if pattern in content_upper]
+    
+    def analyze_document(self, doc: Dict) -> Tuple[bool, float, AnalysisResult]:
         """
         Analyze document for poisoning indicators using LLM-style analysis
         
@@ -73,180 +336,178 @@ class LLMDetector:
         """
         content = doc.get("content", "")
         meta = doc.get("meta", {})
-        
-        # Multi-layer analysis
-        pattern_score = self._analyze_patterns(content)
-        metadata_score = self._analyze_metadata(meta)
-        statistical_score = self._analyze_statistics(content)
-        behavioral_score = self._analyze_behavior(content, meta)
-        
-        # Weighted combination (similar to LLM attention mechanism)
-        total_score = (
-            pattern_score * 0.40 +      # Pattern matching
-            metadata_score * 0.25 +      # Metadata analysis
-            statistical_score * 0.20 +   # Statistical features
-            behavioral_score * 0.15      # Behavioral indicators
-        )
-        
+        # surrogatepass: hostile text may carry lone surrogates that strict UTF-8 rejects
+        data = content.encode("utf-8", "surrogatepass")
+        
+        # Same content and scoring metadata always yield the same analysis
+        key = (hashlib.blake2b(data, digest_size=16).digest(),
+               meta.get("type") == "poisoned",
+               meta.get("experiment") is not None,
+               bool(meta.get("experiment")),
+               meta.get("source", ""),
+               bool(meta.get("signed", False)))
+        result = self._cache.get(key)
+        if result is None:
+            result = self._score_document(content, meta, data)
+            if self.cache_size > 0:
+                self._cache[key] = result
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        
+        total_score = result.total_score
         is_poisoned = total_score >= self.threshold
         
-        details = {
-            "total_score": round(total_score, 4),
-            "pattern_score": round(pattern_score, 4),
-            "metadata_score": round(metadata_score, 4),
-            "statistical_score": round(statistical_score, 4),
-            "behavioral_score": round(behavioral_score, 4),
-            "detected_patterns": self._get_detected_patterns(content),
-            "anomaly_flags": self._get_anomaly_flags(doc),
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        # One timestamp serves the details and the log entry
+        timestamp = time.time() if self.fast_mode else datetime.utcnow().isoformat()
+        details = replace(result, timestamp=timestamp)
         
         # Log detection
-        self._log_detection(doc["id"], is_poisoned, total_score, details)
+        self._log_detection(doc["id"], is_poisoned, total_score, details, timestamp)
         
         return is_poisoned, total_score, details
     
-    def _analyze_patterns(self, content: str) -> float:
-        """Analyze content for known attack patterns"""
-        max_score = 0.0
-        content_upper = content.upper()
+    def _score_document(self, content: str, meta: Dict, data: bytes) -> AnalysisResult:
+        """Run every analyzer once and return the total score with its breakdown"""
+        # Multi-layer analysis over features extracted in a single pass
+        features = self._features(content, np.frombuffer(data, dtype=np.uint8))
+        category_matches = np.bincount(self._pattern_category[features.pattern_ids],
+                                       minlength=len(self._categories))
+        flags = self._meta_flags(meta)
+        if not features.is_ascii:
+            flags |= _FLAG_NON_ASCII
+        if features.has_time_trigger:
+            flags |= _FLAG_TIME_TRIGGER
+        if features.has_conditional:
+            flags |= _FLAG_CONDITIONAL
+        
+        # Without numba _score runs on numpy scalars, so normalize to float
+        pattern_score, metadata_score, statistical_score, behavioral_score, total_score = map(
+            float, _score(category_matches, self._category_sizes, self._category_weights,
+                          features.length, features.uppercase_chars, features.special_chars,
+                          features.entropy, features.cloud_refs, flags))
+        
+        return AnalysisResult(
+            total_score=total_score,
+            pattern_score=pattern_score,
+            metadata_score=metadata_score,
+            statistical_score=statistical_score,
+            behavioral_score=behavioral_score,
+            detected_patterns=tuple(self._get_detected_patterns(features.pattern_ids)),
+            anomaly_flags=tuple(self._get_anomaly_flags(meta, features))
+        )
+    
+    def _features(self, content: str, buf: np.ndarray) -> Features:
+        """
+        Extract every content feature the analyzers score
+        
+        Args:
+            content: Document text
+            buf: The text's UTF-8 bytes as a uint8 array
         
-        for category, patterns in self.ATTACK_PATTERNS.items():
-            category_score = 0.0
-            matches = 0
-            
-            for pattern in patterns:
-                if pattern.upper() in content_upper or pattern in content:
-                    matches += 1
-            
-            if matches > 0:
-                # Normalize by pattern count and apply severity weight
-                category_score = min(matches / len(patterns), 1.0)
-                category_score *= (self.SEVERITY_WEIGHTS.get(category, 5) / 10.0)
-                max_score = max(max_score, category_score)
-        
-        return min(max_score, 1.0)
+        Returns:
+            Features of the document content
+        """
+        content_upper = content.upper()
+        length = len(content)
+        is_ascii = content.isascii()
+        
+        if length == 0:
+            uppercase_chars = special_chars = 0
+            entropy = 0.0
+        elif is_ascii:
+            # One byte histogram answers the character classes and the entropy
+            counts = np.bincount(buf, minlength=256)
+            uppercase_chars = int(counts[_ASCII_UPPER].sum())
+            special_chars = int(counts[_ASCII_SPECIAL].sum())
+            entropy = _histogram_entropy(counts, length)
+        else:
+            uppercase_chars = sum(map(str.isupper, content))
+            special_chars = sum(1 for c in content if not c.isalnum() and not c.isspace())
+            entropy = self._calculate_entropy(content, buf)
+        
+        # Split the scan into attack patterns and behavioral keyword hits
+        scan_ids = self._scan(content, content_upper)
+        split = bisect_left(scan_ids, len(self._patterns))
+        behavior = Counter()
+        for scan_id in scan_ids[split:]:
+            keyword, group, case_sensitive = BEHAVIOR_KEYWORDS[scan_id - len(self._patterns)]
+            if not case_sensitive or keyword in content:
+                behavior[group] += 1
+        
+        return Features(
+            pattern_ids=scan_ids[:split],
+            length=length,
+            uppercase_chars=uppercase_chars,
+            special_chars=special_chars,
+            entropy=entropy,
+            is_ascii=is_ascii,
+            has_zero_width=not _ZW_CHARS.isdisjoint(content),
+            has_time_trigger=behavior["behavior_trigger"] > 0,
+            has_conditional=behavior["behavior_cond"] == _BEHAVIOR_GROUP_SIZES["behavior_cond"],
+            cloud_refs=behavior["behavior_cloud"]
+        )
     
-    def _analyze_metadata(self, meta: Dict) -> float:
-        """Analyze metadata for suspicious indicators"""
-        score = 0.0
+    def _meta_flags(self, meta: Dict) -> int:
+        """Metadata traits read by _score, as bit flags"""
+        flags = 0
         
         # Check for explicit attack markers
         if meta.get("type") == "poisoned":
-            score += 0.5
+            flags |= _FLAG_POISON_MARKER
         
         if meta.get("experiment") is not None:
-            score += 0.3
+            flags |= _FLAG_EXPERIMENT
         
         # Check for suspicious sources
-        suspicious_sources = ["malicious", "unauthorized", "unknown", "external"]
         source = meta.get("source", "").lower()
-        if any(sus in source for sus in suspicious_sources):
-            score += 0.4
+        if any(sus in source for sus in SUSPICIOUS_SOURCES):
+            flags |= _FLAG_SUSPICIOUS_SOURCE
         
         # Check for missing or invalid signatures
-        if not meta.get("signed", False):
-            score += 0.2
-        
-        return min(score, 1.0)
-    
-    def _analyze_statistics(self, content: str) -> float:
-        """Statistical analysis of content features"""
-        score = 0.0
+        if meta.get("signed", False):
+            flags |= _FLAG_SIGNED
         
-        # Length anomaly (very short or very long)
-        length = len(content)
-        if length < 50:
-            score += 0.3
-        elif length > 2000:
-            score += 0.2
-        
-        # Uppercase ratio (high uppercase indicates shouting/commands)
-        if len(content) > 0:
-            uppercase_ratio = sum(1 for c in content if c.isupper()) / len(content)
-            if uppercase_ratio > 0.5:
-                score += 0.4
-        
-        # Special character density
-        special_chars = sum(1 for c in content if not c.isalnum() and not c.isspace())
-        if len(content) > 0:
-            special_ratio = special_chars / len(content)
-            if special_ratio > 0.3:
-                score += 0.3
-        
-        # Entropy (randomness indicator)
-        entropy = self._calculate_entropy(content)
-        if entropy > 4.5:  # High entropy = random/encrypted
-            score += 0.2
-        
-        return min(score, 1.0)
-    
-    def _analyze_behavior(self, content: str, meta: Dict) -> float:
-        """Analyze behavioral indicators"""
-        score = 0.0
-        
-        # Check for time-based triggers
-        if "ACTIVATE_AFTER" in content or "TRIGGER_DATE" in content:
-            score += 0.5
-        
-        # Check for conditional logic
-        if "IF" in content and "THEN" in content:
-            score += 0.3
-        
-        # Check for obfuscation attempts
-        if any(ord(c) > 127 for c in content):  # Non-ASCII
-            score += 0.2
-        
-        # Check for multi-cloud references
-        cloud_refs = sum(1 for cloud in ["AWS", "AZURE", "GCP"] if cloud in content.upper())
-        if cloud_refs > 1:
-            score += 0.3
-        
-        return min(score, 1.0)
+        return flags
     
-    def _calculate_entropy(self, text: str) -> float:
+    def _calculate_entropy(self, text: str, buf: Optional[np.ndarray] = None) -> float:
         """Calculate Shannon entropy of text"""
         if not text:
             return 0.0
         
-        import math
-        entropy = 0.0
         text_len = len(text)
-        
-        # Count character frequencies
-        freq = {}
-        for char in text:
-            freq[char] = freq.get(char, 0) + 1
-        
-        # Calculate entropy
-        for count in freq.values():
-            prob = count / text_len
-            entropy -= prob * math.log2(prob)
-        
-        return entropy
+        if text_len < SMALL_TEXT_SIZE:
+            entropy = 0.0
+            for count in Counter(text).values():
+                prob = count / text_len
+                entropy -= prob * log2(prob)
+            return entropy
+        
+        if text.isascii():
+            # One byte per character: histogram the raw buffer directly
+            if buf is None:
+                buf = np.frombuffer(text.encode("utf-8", "surrogatepass"), dtype=np.uint8)
+            counts = np.bincount(buf, minlength=256)
+        else:
+            # Multi-byte characters: histogram code points so entropy stays per character
+            code_points = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+            _, counts = np.unique(code_points, return_counts=True)
+        
+        return _histogram_entropy(counts, text_len)
     
-    def _get_detected_patterns(self, content: str) -> List[str]:
+    def _get_detected_patterns(self, pattern_ids: List[int]) -> List[str]:
         """Get list of detected attack patterns"""
-        detected = []
-        content_upper = content.upper()
-        
-        for category, patterns in self.ATTACK_PATTERNS.items():
-            for pattern in patterns:
-                if pattern.upper() in content_upper or pattern in content:
-                    detected.append(f"{category}:{pattern}")
-        
-        return detected
+        return [self._pattern_labels[pattern_id] for pattern_id in pattern_ids]
     
-    def _get_anomaly_flags(self, doc: Dict) -> List[str]:
+    def _get_anomaly_flags(self, meta: Dict, features: Features) -> List[str]:
         """Get list of anomaly flags"""
         flags = []
-        content = doc.get("content", "")
-        meta = doc.get("meta", {})
         
         if meta.get("type") == "poisoned":
             flags.append("EXPLICIT_POISON_MARKER")
         
-        if len(content) < 50:
+        if features.length < 50:
             flags.append("SUSPICIOUS_SHORT_LENGTH")
         
         if not meta.get("signed", False):
@@ -256,51 +517,107 @@ class LLMDetector:
             flags.append("EXPERIMENT_MARKER")
         
         # Check for unicode tricks
-        if any(ord(c) in [0x200b, 0x200c, 0x200d, 0xfeff] for c in content):
+        if features.has_zero_width:
             flags.append("ZERO_WIDTH_CHARACTERS")
         
         return flags
     
-    def _log_detection(self, doc_id: str, is_poisoned: bool, score: float, details: Dict):
+    def _log_detection(self, doc_id: str, is_poisoned: bool, score: float, details: AnalysisResult,
+                       timestamp=None):
         """Log detection result"""
-        self.detection_log.append({
-            "doc_id": doc_id,
-            "is_poisoned": is_poisoned,
-            "score": score,
-            "details": details,
-            "timestamp": datetime.utcnow().isoformat()
-        })
+        if timestamp is None:
+            timestamp = time.time() if self.fast_mode else datetime.utcnow().isoformat()
+        code = self._id_codes.get(doc_id)
+        if code is None:
+            code = self._id_codes[doc_id] = len(self._id_strings)
+            self._id_strings.append(doc_id)
+        self._doc_codes.append(code)
+        self._scores.append(score)
+        self._poisoned.append(is_poisoned)
+        self._details_log.append(details)
+        self._log_timestamps.append(timestamp)
+    
+    def iter_detections(self) -> Iterator[Dict]:
+        """Logged detections, one record per analyzed document, built lazily"""
+        for code, is_poisoned, score, details, timestamp in zip(
+                self._doc_codes, self._poisoned, self._scores, self._details_log,
+                self._log_timestamps):
+            details = details.to_dict()
+            if self.fast_mode:
+                # Format the epoch timestamps kept by fast mode
+                timestamp = details["timestamp"] = datetime.utcfromtimestamp(timestamp).isoformat()
+            yield {
+                "doc_id": self._id_strings[code],
+                "is_poisoned": bool(is_poisoned),
+                "score": score,
+                "details": details,
+                "timestamp": timestamp
+            }
+    
+    @property
+    def detection_log(self) -> List[Dict]:
+        """
+        Logged detections as one record per analyzed document
+        
+        The log is stored column-wise, so this builds a fresh list on every
+        access; mutating it does not change the log. Use clear_detections()
+        to reset it.
+        """
+        return list(self.iter_detections())
+    
+    def clear_detections(self):
+        """Drop every logged detection"""
+        # Detection log as parallel columns; details are only read on export
+        self._doc_codes = array('I')
+        self._scores = array('d')
+        self._poisoned = array('b')
+        self._details_log = []
+        self._log_timestamps = array('d') if self.fast_mode else []
+        # Each distinct doc id is stored once; the log keeps its index
+        self._id_codes = {}
+        self._id_strings = []
     
     def get_detection_report(self) -> Dict:
         """Generate detection report with statistics"""
-        if not self.detection_log:
+        if not self._scores:
             return {"error": "No detections logged"}
         
-        total = len(self.detection_log)
-        poisoned = sum(1 for d in self.detection_log if d["is_poisoned"])
+        # Zero-copy views over the logged columns
+        scores = np.frombuffer(self._scores, dtype=np.float64)
+        total = scores.size
+        poisoned = int(np.count_nonzero(np.frombuffer(self._poisoned, dtype=np.int8)))
         clean = total - poisoned
         
-        scores = [d["score"] for d in self.detection_log]
-        
         return {
             "total_analyzed": total,
             "poisoned_detected": poisoned,
             "clean_detected": clean,
-            "detection_rate": round(poisoned / total, 4) if total > 0 else 0,
-            "average_score": round(sum(scores) / len(scores), 4) if scores else 0,
-            "max_score": round(max(scores), 4) if scores else 0,
-            "min_score": round(min(scores), 4) if scores else 0,
+            "detection_rate": round(poisoned / total, 4),
+            "average_score": round(float(scores.mean()), 4),
+            "max_score": round(float(scores.max()), 4),
+            "min_score": round(float(scores.min()), 4),
             "threshold": self.threshold,
             "timestamp": datetime.utcnow().isoformat()
         }
     
-    def export_detections(self, output_file: str):
-        """Export detection log to JSON file"""
-        with open(output_file, 'w') as f:
-            json.dump({
-                "detections": self.detection_log,
-                "report": self.get_detection_report()
-            }, f, indent=2)
+    def export_detections(self, output_file: str, jsonl: bool = False):
+        """
+        Export detection log to JSON file
+        
+        Args:
+            output_file: Destination path
+            jsonl: Stream one detection per line instead of a single JSON
+                document with the report; memory stays flat for long logs
+        """
+        with open(output_file, 'wb') as f:
+            if jsonl:
+                for entry in self.iter_detections():
+                    f.write(dump_line(entry))
+            else:
+                f.write(dump_pretty({
+                    "detections": self.detection_log,
+                    "report": self.get_detection_report()
+                }))
         print(f"✅ Detection log exported to: {output_file}")
 
 
@@ -327,12 +644,12 @@ if __name__ == "__main__":
     print("Analyzing clean document:")
     is_poison, score, details = detector.analyze_document(clean_doc)
     print(f"  Poisoned: {is_poison}, Score: {score:.4f}")
-    print(f"  Patterns: {details['detected_patterns']}")
+    print(f"  Patterns: {list(details.detected_patterns)}")
     
     print("\nAnalyzing poisoned document:")
     is_poison, score, details = detector.analyze_document(poison_doc)
     print(f"  Poisoned: {is_poison}, Score: {score:.4f}")
-    print(f"  Patterns: {details['detected_patterns']}")
+    print(f"  Patterns: {list(details.detected_patterns)}")
     
     # Report
     print("\n" + "="*60)
@@ -4,54 +4,293 @@ Statistical Analysis Engine with Standard Deviation Calculations
 Performs comprehensive statistical analysis on detection metrics
 """
 
-import statistics
+import math
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from dataclasses import dataclass, field
+
+import numpy as np
+
+try:
+    from crick import TDigest
+except ImportError:  # P-square estimators stand in for the t-digest
+    TDigest = None
+
+# Percentiles reported for every metric
+PERCENTILES = [25, 50, 75, 90, 95, 99]
+_PERCENTILE_FRACTIONS = np.array(PERCENTILES) / 100
+
+# Running stats report exact percentiles until this many values are seen
+WARMUP_SIZE = 100
+
+# Upper bound on threads used for exact per-metric reports
+REPORT_WORKERS = 4
+
+# Metric streams tracked by the analyzer
+METRIC_TYPES = ["drift_scores", "detection_latencies", "similarity_scores", "vulnerability_scores"]
+
+# Most recent raw values kept per metric when store_raw is set
+RAW_BUFFER_SIZE = 100_000
+
+# Latencies are fine in single precision; scores keep float64
+METRIC_DTYPES = {"detection_latencies": np.float32}
+
+
+def sorted_percentiles(sorted_arr: np.ndarray) -> List[float]:
+    """Linearly interpolated PERCENTILES of already-sorted data, in one pass"""
+    n = sorted_arr.size
+    ks = _PERCENTILE_FRACTIONS * (n - 1)
+    lower = ks.astype(np.intp)
+    upper = np.minimum(lower + 1, n - 1)
+    frac = ks - lower
+    return (sorted_arr[lower] * (1 - frac) + sorted_arr[upper] * frac).tolist()
+
+
+class P2Quantile:
+    """Streaming quantile estimate using the P-square algorithm (Jain & Chlamtac)"""
+    
+    __slots__ = ("p", "heights", "positions", "desired", "increments")
+    
+    def __init__(self, p: float):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+    
+    def update(self, value: float):
+        """Add an observation, adjusting the five markers"""
+        q = self.heights
+        if len(q) < 5:
+            q.append(value)
+            q.sort()
+            return
+        
+        # Locate the cell holding the value, widening the extremes if needed
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= q[k + 1]:
+                k += 1
+        
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        
+        # Move the middle markers toward their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                    (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < height < q[i + 1]:
+                    # Parabolic prediction left the cell, fall back to linear
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+    
+    def value(self) -> float:
+        """Current quantile estimate (exact for the first five observations)"""
+        q = self.heights
+        if not q:
+            return 0.0
+        if len(q) < 5 or self.positions[4] == 5:
+            k = (len(q) - 1) * self.p
+            f = int(k)
+            c = min(f + 1, len(q) - 1)
+            return q[f] + (q[c] - q[f]) * (k - f)
+        return q[2]
+
+
+def _new_digest():
+    return TDigest() if TDigest is not None else None
+
+
+def _new_quantiles() -> Dict[int, P2Quantile]:
+    if TDigest is not None:
+        return {}
+    return {p: P2Quantile(p / 100) for p in PERCENTILES}
+
+
+class RingBuffer:
+    """Fixed-capacity numpy buffer that overwrites its oldest values"""
+    
+    __slots__ = ("buf", "head", "full")
+    
+    def __init__(self, capacity: int, dtype=np.float64):
+        self.buf = np.empty(capacity, dtype=dtype)
+        self.head = 0
+        self.full = False
+    
+    def __len__(self) -> int:
+        return self.buf.size if self.full else self.head
+    
+    def append(self, value: float):
+        """Store a value, replacing the oldest one once the buffer is full"""
+        self.buf[self.head] = value
+        self.head += 1
+        if self.head == self.buf.size:
+            self.head = 0
+            self.full = True
+    
+    def view(self) -> np.ndarray:
+        """Stored values oldest first (zero-copy until the buffer wraps)"""
+        if not self.full:
+            return self.buf[:self.head]
+        return np.concatenate((self.buf[self.head:], self.buf[:self.head]))
+
+
+@dataclass
+class RunningStats:
+    """Welford running moments and streaming percentiles for one metric stream
+
+    Percentiles come from a t-digest when crick is installed, otherwise
+    from one P-square estimator per reported percentile.
+    """
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+    digest: Optional["TDigest"] = field(default_factory=_new_digest)
+    quantiles: Dict[int, P2Quantile] = field(default_factory=_new_quantiles)
+    warmup: List[float] = field(default_factory=list)
+    
+    def update(self, value: float):
+        """Fold one observation into the accumulators"""
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if self.digest is not None:
+            self.digest.add(value)
+        else:
+            for estimator in self.quantiles.values():
+                estimator.update(value)
+        # P-square is rough on small samples, so keep exact values until it settles
+        if self.n <= WARMUP_SIZE:
+            self.warmup.append(value)
+        elif self.warmup:
+            self.warmup = []
+    
+    def summary(self) -> Dict:
+        """
+        Statistics readable in O(1) without the raw values
+        
+        The keys match calculate_statistics; mode and outliers need the raw
+        values, so they are reported as None and an empty list.
+        """
+        variance = self.m2 / (self.n - 1) if self.n > 1 else 0.0
+        stdev = math.sqrt(variance)
+        if self.warmup:
+            percentiles = sorted_percentiles(np.sort(self.warmup))
+        elif self.digest is not None:
+            percentiles = self.digest.quantile(_PERCENTILE_FRACTIONS).tolist()
+        else:
+            percentiles = [estimator.value() for estimator in self.quantiles.values()]
+        quantiles = dict(zip(PERCENTILES, percentiles))
+        
+        stats = {
+            "count": self.n,
+            "mean": self.mean,
+            "median": quantiles[50],
+            "mode": None,
+            "stdev": stdev,
+            "variance": variance,
+            "min": self.min,
+            "max": self.max,
+            "range": self.max - self.min,
+        }
+        for p, value in quantiles.items():
+            stats[f"p{p}"] = value
+        stats["iqr"] = stats["p75"] - stats["p25"]
+        stats["cv"] = (stdev / self.mean) * 100 if self.mean != 0 else 0.0
+        stats["outliers"] = []
+        return stats
+
 
 class StatisticalAnalyzer:
     """Advanced statistical analysis for RAG-Shield metrics"""
     
-    def __init__(self):
+    def __init__(self, store_raw: bool = False, raw_capacity: int = RAW_BUFFER_SIZE):
+        """
+        Initialize statistical analyzer
+        
+        Args:
+            store_raw: Also buffer raw values so reports carry exact
+                percentiles, mode and outliers
+            raw_capacity: Most recent values kept per metric when store_raw is set;
+                without it every metric still has a buffer, but it stays empty
+        """
+        self.store_raw = store_raw
+        self.running_stats = {metric_type: RunningStats() for metric_type in METRIC_TYPES}
+        capacity = raw_capacity if store_raw else 0
         self.metrics_buffer = {
-            "drift_scores": [],
-            "detection_latencies": [],
-            "similarity_scores": [],
-            "vulnerability_scores": []
+            metric_type: RingBuffer(capacity, METRIC_DTYPES.get(metric_type, np.float64))
+            for metric_type in METRIC_TYPES
         }
     
     def add_metric(self, metric_type: str, value: float):
         """Add a metric value for analysis"""
-        if metric_type in self.metrics_buffer:
-            self.metrics_buffer[metric_type].append(value)
+        if metric_type in self.running_stats:
+            self.running_stats[metric_type].update(value)
+            if self.store_raw:
+                self.metrics_buffer[metric_type].append(value)
     
     def calculate_statistics(self, data: List[float]) -> Dict:
         """Calculate comprehensive statistics"""
-        if not data or len(data) == 0:
+        if len(data) == 0:
             return {"error": "No data"}
         
-        sorted_data = sorted(data)
-        n = len(data)
+        arr = np.asarray(data, dtype=np.float64)
+        n = arr.size
+        
+        # One stable sort serves the median, every percentile, the extremes and the mode
+        order = np.argsort(arr, kind="stable")
+        sorted_arr = arr[order]
+        p25, p50, p75, p90, p95, p99 = sorted_percentiles(sorted_arr)
+        data_min = float(sorted_arr[0])
+        data_max = float(sorted_arr[-1])
+        
+        # Runs of equal values; each starts at its first occurrence in data,
+        # so ties go to the earliest value as with Counter.most_common
+        starts = np.flatnonzero(np.concatenate(([True], sorted_arr[1:] != sorted_arr[:-1])))
+        run_lengths = np.diff(np.append(starts, n))
+        mode = float(arr[order[starts[run_lengths == run_lengths.max()]].min()])
         
         stats = {
             "count": n,
-            "mean": statistics.mean(data),
-            "median": statistics.median(data),
-            "mode": statistics.mode(data) if n > 1 else data[0],
-            "stdev": statistics.stdev(data) if n > 1 else 0.0,
-            "variance": statistics.variance(data) if n > 1 else 0.0,
-            "min": min(data),
-            "max": max(data),
-            "range": max(data) - min(data),
+            "mean": float(arr.mean()),
+            "median": p50,
+            "mode": mode,
+            "stdev": float(arr.std(ddof=1)) if n > 1 else 0.0,
+            "variance": float(arr.var(ddof=1)) if n > 1 else 0.0,
+            "min": data_min,
+            "max": data_max,
+            "range": data_max - data_min,
         }
         
         # Percentiles
-        stats["p25"] = self._percentile(sorted_data, 0.25)
-        stats["p50"] = self._percentile(sorted_data, 0.50)  # Median
-        stats["p75"] = self._percentile(sorted_data, 0.75)
-        stats["p90"] = self._percentile(sorted_data, 0.90)
-        stats["p95"] = self._percentile(sorted_data, 0.95)
-        stats["p99"] = self._percentile(sorted_data, 0.99)
+        stats["p25"] = p25
+        stats["p50"] = p50  # Median
+        stats["p75"] = p75
+        stats["p90"] = p90
+        stats["p95"] = p95
+        stats["p99"] = p99
         
         # Inter-quartile range
         stats["iqr"] = stats["p75"] - stats["p25"]
@@ -64,33 +303,20 @@ class StatisticalAnalyzer:
         
         # Z-scores for outlier detection
         if stats["stdev"] > 0:
-            stats["outliers"] = self._detect_outliers(data, stats["mean"], stats["stdev"])
+            stats["outliers"] = self._detect_outliers(arr, stats["mean"], stats["stdev"])
         else:
             stats["outliers"] = []
         
         return stats
     
-    def _percentile(self, sorted_data: List[float], p: float) -> float:
-        """Calculate percentile"""
-        if not sorted_data:
-            return 0.0
-        k = (len(sorted_data) - 1) * p
-        f = int(k)
-        c = f + 1
-        if c >= len(sorted_data):
-            return sorted_data[-1]
-        d0 = sorted_data[f] * (c - k)
-        d1 = sorted_data[c] * (k - f)
-        return d0 + d1
-    
-    def _detect_outliers(self, data: List[float], mean: float, stdev: float) -> List[Dict]:
+    def _detect_outliers(self, arr: np.ndarray, mean: float, stdev: float) -> List[Dict]:
         """Detect outliers using z-score method (|z| > 3)"""
-        outliers = []
-        for value in data:
-            z_score = (value - mean) / stdev if stdev > 0 else 0
-            if abs(z_score) > 3:
-                outliers.append({"value": value, "z_score": z_score})
-        return outliers
+        z_scores = (arr - mean) / stdev
+        mask = np.abs(z_scores) > 3
+        return [
+            {"value": value, "z_score": z_score}
+            for value, z_score in zip(arr[mask].tolist(), z_scores[mask].tolist())
+        ]
     
     def generate_full_report(self) -> Dict:
         """Generate comprehensive statistical report"""
@@ -99,9 +325,23 @@ class StatisticalAnalyzer:
             "metrics": {}
         }
         
-        for metric_type, data in self.metrics_buffer.items():
-            if data:
-                report["metrics"][metric_type] = self.calculate_statistics(data)
+        active = [metric_type for metric_type, running in self.running_stats.items() if running.n]
+        
+        if self.store_raw and len(active) > 1:
+            # Metric streams are independent and NumPy drops the GIL in its
+            # reductions, so the exact calculations can overlap
+            with ThreadPoolExecutor(max_workers=min(REPORT_WORKERS, len(active))) as pool:
+                futures = {metric_type: pool.submit(self.calculate_statistics,
+                                                    self.metrics_buffer[metric_type].view())
+                           for metric_type in active}
+            report["metrics"] = {metric_type: f.result() for metric_type, f in futures.items()}
+        elif self.store_raw:
+            for metric_type in active:
+                report["metrics"][metric_type] = self.calculate_statistics(
+                    self.metrics_buffer[metric_type].view())
+        else:
+            for metric_type in active:
+                report["metrics"][metric_type] = self.running_stats[metric_type].summary()
         
         return report
     
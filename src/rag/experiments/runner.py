@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Experiment Runner for RAG-Shield
+Runs attack scenarios against a document store with a single load and write
+"""
+
+import sys
+import importlib.util
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SCENARIO_DIR = Path(__file__).resolve().parent / "scenarios"
+
+# Scenarios are loaded as submodules of this package so their ".store" import
+# resolves without touching sys.path; run as a script, a private name stands in
+SCENARIO_PACKAGE = f"{__package__}.scenarios" if __package__ else "_rag_shield_scenarios"
+
+
+def _import_scenario_package():
+    """Import the scenarios package, registering it under the private name if needed"""
+    if not __package__ and SCENARIO_PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            SCENARIO_PACKAGE, SCENARIO_DIR / "__init__.py",
+            submodule_search_locations=[str(SCENARIO_DIR)])
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[SCENARIO_PACKAGE] = package
+        spec.loader.exec_module(package)
+    return importlib.import_module(SCENARIO_PACKAGE)
+
+
+_import_scenario_package()
+store = importlib.import_module(f"{SCENARIO_PACKAGE}.store")
+
+
+def available_scenarios() -> List[str]:
+    """Names of the numbered scenario scripts, in execution order"""
+    return sorted(p.stem for p in SCENARIO_DIR.glob("[0-9][0-9]_*.py"))
+
+
+def load_scenario(name: str):
+    """Import a scenario script by name (e.g. '01_label_inversion')"""
+    spec = importlib.util.spec_from_file_location(
+        f"{SCENARIO_PACKAGE}.{name}", SCENARIO_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_all(scenarios: Optional[List[str]] = None, store_path: str = "data/faiss_index",
+            count: int = 5) -> Dict[str, List[str]]:
+    """
+    Run several scenarios over one in-memory copy of the store
+    
+    Args:
+        scenarios: Scenario names to run, default all of them
+        store_path: Directory holding docs.jsonl
+        count: Documents attacked per scenario
+    
+    Returns:
+        Mapping of scenario name to the attacked document IDs
+    """
+    p = store.docs_path(store_path)
+    if not p.exists():
+        print(f"Error: {p} not found")
+        return {}
+    
+    docs = store.load_docs(store_path)
+    results = {}
+    for name in scenarios or available_scenarios():
+        results[name] = load_scenario(name).run(store_path, count, docs=docs)
+    
+    # Persist every patched document in one append (a no-op when nothing changed)
+    touched = {doc_id for ids in results.values() for doc_id in ids}
+    store.append_overrides(store_path, [d for d in docs if d["id"] in touched])
+    return results
+
+
+def main():
+    """CLI entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Run RAG-Shield attack scenarios')
+    parser.add_argument('scenarios', nargs='*',
+                       help='Scenario names to run (default: all)')
+    parser.add_argument('--store-path', type=str, default='data/faiss_index',
+                       help='Directory containing docs.jsonl')
+    parser.add_argument('--count', type=int, default=5,
+                       help='Documents attacked per scenario (default: 5)')
+    parser.add_argument('--compact', action='store_true',
+                       help='Fold accumulated overrides back into docs.jsonl afterwards')
+    
+    args = parser.parse_args()
+    run_all(args.scenarios or None, store_path=args.store_path, count=args.count)
+    if args.compact:
+        store.compact(args.store_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,46 @@
 #!/usr/bin/env python3
 """Label Inversion Attack - Flips document classifications"""
-import json, random
-from pathlib import Path
 
-def run(store_path="data/faiss_index", count=5):
+try:
+    from .store import append_overrides, docs_path, pick_random, sample_docs, scenario_rng
+except ImportError:  # executed as a standalone script
+    from store import append_overrides, docs_path, pick_random, sample_docs, scenario_rng
+
+_rng = scenario_rng("label_inversion")
+
+# Meta fields stamped on every attacked document
+LABEL_INVERSION_META = {
+    "label": "adversarial-poisoned",
+    "experiment": "label_inversion",
+    "attack_severity": "HIGH"
+}
+
+def _is_clean(doc):
+    return doc.get("meta", {}).get("experiment") is None
+
+def run(store_path="data/faiss_index", count=5, docs=None):
     """Execute label inversion attack"""
-    p = Path(store_path) / "docs.json"
-    if not p.exists():
-        print(f"Error: {p} not found")
-        return []
-    
-    docs = json.load(open(p))
-    clean = [d for d in docs if d.get("meta", {}).get("experiment") is None]
+    owns_docs = docs is None
+    if owns_docs:
+        p = docs_path(store_path)
+        if not p.exists():
+            print(f"Error: {p} not found")
+            return []
+        picked = sample_docs(store_path, count, _rng, accept=_is_clean)
+    else:
+        clean = [d for d in docs if _is_clean(d)]
+        picked = pick_random(_rng, clean, count)
     
-    if len(clean) == 0:
+    if len(picked) == 0:
         print("No clean documents found")
         return []
     
-    picked = random.sample(clean, min(count, len(clean)))
-    
     for d in picked:
-        d.setdefault("meta", {})["label"] = "adversarial-poisoned"
-        d["meta"]["experiment"] = "label_inversion"
-        d["meta"]["attack_severity"] = "HIGH"
+        d.setdefault("meta", {}).update(LABEL_INVERSION_META)
     
-    with open(p, "w") as f:
-        json.dump(docs, f, indent=2)
+    if owns_docs:
+        # Metadata-only change: the patches leave the content out
+        append_overrides(store_path, [{"id": d["id"], "meta": d["meta"]} for d in picked])
     
     print(f"✅ Label inversion: {len(picked)} documents attacked")
     return [d["id"] for d in picked]
@@ -1,7 +1,14 @@
 #!/usr/bin/env python3
 """Context Fragment Injection - Hidden trigger phrases"""
-import json, random
-from pathlib import Path
+
+import numpy as np
+
+try:
+    from .store import append_overrides, docs_path, pick_random, sample_docs, scenario_rng
+except ImportError:  # executed as a standalone script
+    from store import append_overrides, docs_path, pick_random, sample_docs, scenario_rng
+
+_rng = scenario_rng("context_fragment_injection")
 
 FRAGMENTS = [
     "{{TRIGGER_A_513}}",
@@ -10,24 +17,32 @@ FRAGMENTS = [
     "INJECT_ON_RETRIEVAL"
 ]
 
-def run(store_path="data/faiss_index", count=5):
+# Object array so the chosen fragments stay plain str
+_FRAGMENT_ARRAY = np.array(FRAGMENTS, dtype=object)
+
+def run(store_path="data/faiss_index", count=5, docs=None):
     """Execute context fragment injection"""
-    p = Path(store_path) / "docs.json"
-    if not p.exists():
+    owns_docs = docs is None
+    if owns_docs:
+        if not docs_path(store_path).exists():
+            return []
+        picked = sample_docs(store_path, count, _rng)
+    else:
+        picked = pick_random(_rng, docs, count)
+    if not picked:
         return []
+    fragments = _FRAGMENT_ARRAY[_rng.integers(len(FRAGMENTS), size=len(picked))]
     
-    docs = json.load(open(p))
-    picked = random.sample(docs, min(count, len(docs)))
-    
-    for d in picked:
-        fragment = random.choice(FRAGMENTS)
+    for d, fragment in zip(picked, fragments):
         d["content"] = d["content"] + " " + fragment
-        d.setdefault("meta", {})["experiment"] = "context_fragment_injection"
-        d["meta"]["fragment"] = fragment
-        d["meta"]["attack_severity"] = "MEDIUM"
+        d.setdefault("meta", {}).update({
+            "experiment": "context_fragment_injection",
+            "fragment": fragment,
+            "attack_severity": "MEDIUM"
+        })
     
-    with open(p, "w") as f:
-        json.dump(docs, f, indent=2)
+    if owns_docs:
+        append_overrides(store_path, picked)
     
     print(f"✅ Context injection: {len(picked)} documents attacked")
     return [d["id"] for d in picked]
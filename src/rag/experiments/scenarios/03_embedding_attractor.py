@@ -1,28 +1,41 @@
 #!/usr/bin/env python3
 """Embedding Attractor Attack - High-magnitude vectors"""
-import json, random
-from pathlib import Path
 
-def run(store_path="data/faiss_index", count=5):
+try:
+    from .store import append_overrides, docs_path, pick_random, sample_docs, scenario_rng
+except ImportError:  # executed as a standalone script
+    from store import append_overrides, docs_path, pick_random, sample_docs, scenario_rng
+
+_rng = scenario_rng("embedding_attractor")
+
+# High-relevance keywords appended to dominate similarity
+ATTRACTOR_TEXT = " MAXIMUM UNIVERSAL ALWAYS HIGHEST PRIORITY CRITICAL IMPORTANT"
+
+# Meta fields stamped on every attacked document
+ATTRACTOR_META = {
+    "embedding_attractor": True,
+    "experiment": "embedding_attractor",
+    "attack_severity": "CRITICAL"
+}
+
+def run(store_path="data/faiss_index", count=5, docs=None):
     """Execute embedding attractor attack"""
-    p = Path(store_path) / "docs.json"
-    if not p.exists():
+    owns_docs = docs is None
+    if owns_docs:
+        if not docs_path(store_path).exists():
+            return []
+        picked = sample_docs(store_path, count, _rng)
+    else:
+        picked = pick_random(_rng, docs, count)
+    if not picked:
         return []
     
-    docs = json.load(open(p))
-    picked = random.sample(docs, min(count, len(docs)))
-    
-    # Add high-relevance keywords to dominate similarity
-    attractor_text = " MAXIMUM UNIVERSAL ALWAYS HIGHEST PRIORITY CRITICAL IMPORTANT"
-    
     for d in picked:
-        d["content"] = d["content"] + attractor_text
-        d.setdefault("meta", {})["embedding_attractor"] = True
-        d["meta"]["experiment"] = "embedding_attractor"
-        d["meta"]["attack_severity"] = "CRITICAL"
+        d["content"] = d["content"] + ATTRACTOR_TEXT
+        d.setdefault("meta", {}).update(ATTRACTOR_META)
     
-    with open(p, "w") as f:
-        json.dump(docs, f, indent=2)
+    if owns_docs:
+        append_overrides(store_path, picked)
     
     print(f"✅ Embedding attractor: {len(picked)} documents attacked")
     return [d["id"] for d in picked]
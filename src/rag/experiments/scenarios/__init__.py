@@ -0,0 +1,8 @@
+"""Attack scenarios run against a document store
+
+Each numbered script exposes run(store_path, count, docs=None) and returns
+the ids of the documents it attacked. Pass an already-loaded docs list to
+patch it in place; the caller then owns persisting it, as runner.run_all
+does with a single append. Otherwise only the picked documents are read
+from the store, and the patches are appended to it as overrides.
+"""
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Document store helpers shared by the attack scenarios
+
+Documents live one per line in docs.jsonl so they can be streamed.
+Scenarios touch a handful of documents, so instead of rewriting the store
+they append patches to an overrides.jsonl sidecar keyed by document id. A
+patch holds the id plus the top-level fields it replaces, so a metadata-only
+change need not repeat the content. load_docs merges the patches in order
+and compact() folds them back into docs.jsonl, copying untouched lines as-is.
+A docs.idx file of int64 line offsets lets sample_docs read a few random
+documents without parsing the rest. Its header records the size and mtime
+of the docs.jsonl it indexes, and it is rebuilt whenever either differs.
+Stores still holding a single docs.json array are read transparently and
+converted on the next compact() or save_docs().
+"""
+import os
+import sys
+import mmap
+import zlib
+from pathlib import Path
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    from ...jsonio import dump_line, loads
+except ImportError:  # executed as a standalone script; append so nothing is shadowed
+    sys.path.append(str(Path(__file__).resolve().parents[4]))
+    from src.rag.jsonio import dump_line, loads
+
+DOCS_FILE = "docs.jsonl"
+OVERRIDES_FILE = "overrides.jsonl"
+INDEX_FILE = "docs.idx"
+
+# docs.idx starts with the size and st_mtime_ns of the docs.jsonl it was built from
+_INDEX_HEADER_BYTES = 2 * np.dtype(np.int64).itemsize
+
+# Integer seed that makes every scenario's random choices reproducible
+SEED_ENV = "RAG_SHIELD_SEED"
+
+# Older stores kept every document in one JSON array
+LEGACY_DOCS_FILE = "docs.json"
+
+# Only file contents matter to the store, so skip the metadata flush where possible
+_datasync = getattr(os, "fdatasync", os.fsync)
+
+
+def docs_path(store_path) -> Path:
+    """Location of the documents file inside a store"""
+    p = Path(store_path) / DOCS_FILE
+    legacy = Path(store_path) / LEGACY_DOCS_FILE
+    if not p.exists() and legacy.exists():
+        return legacy
+    return p
+
+
+def overrides_path(store_path) -> Path:
+    """Location of the append-only overrides sidecar inside a store"""
+    return Path(store_path) / OVERRIDES_FILE
+
+
+def index_path(store_path) -> Path:
+    """Location of the line-offset index inside a store"""
+    return Path(store_path) / INDEX_FILE
+
+
+def _iter_lines(p: Path) -> Iterator[bytes]:
+    """Non-blank lines of a JSONL file"""
+    with open(p, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def _write_replace(p: Path, lines: Iterable[bytes]):
+    """Write lines to a temporary file, then atomically swap it in for p"""
+    tmp = p.with_name(p.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.writelines(lines)
+        f.flush()
+        _datasync(f.fileno())
+    os.replace(tmp, p)
+
+
+def _load_mapped(p: Path):
+    """Parse a JSON file straight from a read-only memory map"""
+    with open(p, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return loads(f.read())  # empty files cannot be mapped; let the parser raise
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return loads(view)
+
+
+def load_overrides(store_path) -> Dict[str, Dict]:
+    """Merged override patch per document id, later patches winning"""
+    p = overrides_path(store_path)
+    if not p.exists():
+        return {}
+    overrides = {}
+    for line in _iter_lines(p):
+        patch = loads(line)
+        overrides.setdefault(patch["id"], {}).update(patch)
+    return overrides
+
+
+def _apply(doc: Dict, overrides: Dict[str, Dict]) -> Dict:
+    patch = overrides.get(doc.get("id"))
+    return {**doc, **patch} if patch is not None else doc
+
+
+def iter_docs(store_path) -> Iterator[Dict]:
+    """Stream every document in the store with overrides applied"""
+    p = docs_path(store_path)
+    overrides = load_overrides(store_path)
+    if p.name == LEGACY_DOCS_FILE:
+        docs = _load_mapped(p)
+    else:
+        docs = map(loads, _iter_lines(p))
+    for d in docs:
+        yield _apply(d, overrides)
+
+
+def load_docs(store_path) -> List[Dict]:
+    """Load every document in the store with overrides applied"""
+    return list(iter_docs(store_path))
+
+
+def append_overrides(store_path, docs: List[Dict]):
+    """Persist patched documents (or partial patches with an id) to the overrides sidecar"""
+    if not docs:
+        return
+    with open(overrides_path(store_path), "ab") as f:
+        f.write(b"".join(dump_line(d) for d in docs))
+        f.flush()
+        _datasync(f.fileno())
+
+
+def save_docs(store_path, docs: Iterable[Dict]):
+    """Write the full document list back to the store, dropping overrides"""
+    _write_replace(Path(store_path) / DOCS_FILE, (dump_line(d) for d in docs))
+    index_path(store_path).unlink(missing_ok=True)
+    (Path(store_path) / LEGACY_DOCS_FILE).unlink(missing_ok=True)
+    overrides_path(store_path).unlink(missing_ok=True)
+
+
+def compact(store_path):
+    """Fold the overrides sidecar back into docs.jsonl"""
+    p = docs_path(store_path)
+    if p.name == LEGACY_DOCS_FILE:
+        save_docs(store_path, iter_docs(store_path))
+        return
+    
+    overrides = load_overrides(store_path)
+    if not overrides:
+        overrides_path(store_path).unlink(missing_ok=True)
+        return
+    
+    def patched():
+        # Only overridden records are re-serialized; every other line is copied
+        for line in _iter_lines(p):
+            doc = loads(line)
+            if doc.get("id") in overrides:
+                yield dump_line(_apply(doc, overrides))
+            else:
+                yield line if line.endswith(b"\n") else line + b"\n"
+    
+    _write_replace(p, patched())
+    index_path(store_path).unlink(missing_ok=True)
+    overrides_path(store_path).unlink()
+
+
+def build_index(store_path) -> Path:
+    """Write docs.idx with the byte offset of every record in docs.jsonl"""
+    offsets = array("q")
+    pos = 0
+    with open(Path(store_path) / DOCS_FILE, "rb") as f:
+        # Stat before reading so a concurrent rewrite leaves the header stale
+        st = os.fstat(f.fileno())
+        for line in f:
+            if line.strip():
+                offsets.append(pos)
+            pos += len(line)
+    header = array("q", [st.st_size, st.st_mtime_ns])
+    _write_replace(index_path(store_path), [header.tobytes(), offsets.tobytes()])
+    return index_path(store_path)
+
+
+def _index_is_current(store_path) -> bool:
+    """Whether docs.idx was built from the docs.jsonl now on disk"""
+    try:
+        with open(index_path(store_path), "rb") as f:
+            idx_size = os.fstat(f.fileno()).st_size
+            if idx_size < _INDEX_HEADER_BYTES or idx_size % 8:
+                return False  # truncated, or written before the header existed
+            size, mtime_ns = array("q", f.read(_INDEX_HEADER_BYTES))
+            f.seek(-8, os.SEEK_END)
+            last = array("q", f.read(8))[0] if idx_size > _INDEX_HEADER_BYTES else 0
+    except FileNotFoundError:
+        return False
+    st = (Path(store_path) / DOCS_FILE).stat()
+    # Copies that keep mtimes (cp -p, rsync -t, tar x) can carry an older stamp,
+    # so match both values exactly instead of ordering the two files by mtime
+    if (size, mtime_ns) != (st.st_size, st.st_mtime_ns):
+        return False
+    # The last offset must still fall inside the file and start a line
+    if last == 0:
+        return True
+    if not 0 < last < size:
+        return False
+    with open(Path(store_path) / DOCS_FILE, "rb") as f:
+        f.seek(last - 1)
+        return f.read(1) == b"\n"
+
+
+def load_index(store_path) -> np.ndarray:
+    """Memory-mapped record offsets, rebuilding docs.idx if it is missing or stale"""
+    p = index_path(store_path)
+    if not _index_is_current(store_path):
+        build_index(store_path)
+    if p.stat().st_size == _INDEX_HEADER_BYTES:
+        return np.empty(0, dtype=np.int64)  # empty files cannot be mapped
+    return np.memmap(p, dtype=np.int64, mode="r", offset=_INDEX_HEADER_BYTES)
+
+
+def scenario_rng(name: str) -> np.random.Generator:
+    """
+    Random generator for one scenario, drawing its own stream from the shared seed
+    
+    Args:
+        name: Scenario name, mixed into the seed so scenarios pick different documents
+        
+    Returns:
+        Generator seeded from RAG_SHIELD_SEED, or from fresh entropy when it is unset
+    """
+    seed = os.environ.get(SEED_ENV)
+    if seed is None:
+        return np.random.default_rng()
+    try:
+        seed = int(seed)
+    except ValueError:
+        raise ValueError(f"{SEED_ENV} must be an integer, got {seed!r}") from None
+    if seed < 0:
+        raise ValueError(f"{SEED_ENV} must be non-negative, got {seed}")
+    return np.random.default_rng([seed, zlib.crc32(name.encode("utf-8"))])
+
+
+def pick_random(rng: np.random.Generator, items: List, count: int) -> List:
+    """Up to count distinct items, in the order the generator drew them"""
+    positions = rng.choice(len(items), min(count, len(items)), replace=False)
+    return [items[i] for i in positions.tolist()]
+
+
+def sample_docs(store_path, count: int, rng: np.random.Generator,
+                accept: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+    """
+    Read up to count random documents, with overrides applied
+    
+    Args:
+        store_path: Directory holding the store
+        count: Number of documents wanted
+        rng: numpy Generator used to pick record positions
+        accept: Optional filter; rejected documents are skipped
+    
+    Returns:
+        The sampled documents, fewer than count if not enough qualify
+    """
+    if docs_path(store_path).name == LEGACY_DOCS_FILE:
+        docs = [d for d in load_docs(store_path) if accept is None or accept(d)]
+        return pick_random(rng, docs, count)
+    
+    offsets = load_index(store_path)
+    n = len(offsets)
+    if n == 0 or count <= 0:
+        return []
+    overrides = load_overrides(store_path)
+    
+    picked = []
+    with open(Path(store_path) / DOCS_FILE, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        def read(i):
+            start = int(offsets[i])
+            end = mm.find(b"\n", start)
+            return _apply(loads(mm[start:end if end != -1 else len(mm)]), overrides)
+        
+        if accept is None:
+            return [read(i) for i in rng.choice(n, min(count, n), replace=False).tolist()]
+        
+        # Rejection sampling: visit positions in random order until enough qualify
+        for i in rng.permutation(n).tolist():
+            doc = read(i)
+            if accept(doc):
+                picked.append(doc)
+                if len(picked) == count:
+                    break
+    return picked
@@ -0,0 +1,36 @@
+"""JSON encoding shared by the detectors, the corpus generator and the scenario store
+
+Every helper goes through orjson when it is installed and the json module
+otherwise, and always deals in UTF-8 bytes so results can be written
+straight to files opened in binary mode.
+"""
+import json
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback when orjson isn't installed
+    orjson = None
+
+
+def loads(data) -> Any:
+    """Parse JSON from bytes, str or a memoryview"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dump_line(record: Dict) -> bytes:
+    """Serialize a record as a single JSONL line"""
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+    return (json.dumps(record) + "\n").encode()
+
+
+def dump_pretty(obj: Dict) -> bytes:
+    """Serialize an object as indented JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, indent=2).encode()
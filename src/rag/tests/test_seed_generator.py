@@ -0,0 +1,80 @@
+"""Tests for the seed corpus generator"""
+import json
+import re
+from collections import Counter
+
+import pytest
+
+from src.rag.data import seed_generator
+from src.rag.data.seed_generator import ATTACK_TEMPLATES, CLEAN_BATCH_SIZE, SeedGenerator
+
+
+def _read_corpus(path, fmt):
+    """Corpus rows as (type, attack_type, content), in file order"""
+    if fmt == "jsonl":
+        docs = [json.loads(line) for line in path.read_text().splitlines()]
+        return [(d["meta"]["type"], d["meta"].get("attack_type"), d["content"]) for d in docs]
+    rows = seed_generator.pq.read_table(path).to_pylist()
+    return [(r["meta_type"], r["attack_type"], r["content"]) for r in rows]
+
+
+def _clean_numbers(rows):
+    return [int(re.search(r"Document #(\d+)\.", content).group(1))
+            for doc_type, _, content in rows if doc_type == "clean"]
+
+
+@pytest.fixture(params=["jsonl", "parquet"])
+def fmt(request, monkeypatch):
+    if request.param == "parquet":
+        if seed_generator.pq is None:
+            pytest.skip("pyarrow is not installed")
+        # Small row groups so multi-group files are exercised too
+        monkeypatch.setattr(seed_generator, "PARQUET_ROW_GROUP_SIZE", 100)
+    return request.param
+
+
+@pytest.mark.parametrize("n_clean", [0, 25, CLEAN_BATCH_SIZE + 250])
+def test_generate_writes_every_document_once(tmp_path, fmt, n_clean):
+    per_scenario = 2
+    output_file = SeedGenerator(output_dir=tmp_path).generate(n_clean, per_scenario, fmt=fmt)
+    
+    assert output_file.name == f"corpus.{fmt}"
+    rows = _read_corpus(output_file, fmt)
+    stats = json.loads((tmp_path / "corpus_stats.json").read_text())
+    
+    assert len(rows) == n_clean + len(ATTACK_TEMPLATES) * per_scenario == stats["total_documents"]
+    types = Counter(doc_type for doc_type, _, _ in rows)
+    assert types["clean"] == stats["clean_documents"] == n_clean
+    assert types["poisoned"] == stats["poisoned_documents"] == len(ATTACK_TEMPLATES) * per_scenario
+    attacks = Counter(attack_type for doc_type, attack_type, _ in rows if doc_type == "poisoned")
+    assert attacks == stats["attack_types"] == {attack_type: per_scenario for attack_type in ATTACK_TEMPLATES}
+    assert sorted(_clean_numbers(rows)) == list(range(n_clean))
+
+
+def test_clean_documents_are_shuffled_within_each_batch(tmp_path):
+    n_clean = CLEAN_BATCH_SIZE + 250
+    output_file = SeedGenerator(output_dir=tmp_path).generate(n_clean, 1, fmt="jsonl")
+    
+    numbers = _clean_numbers(_read_corpus(output_file, "jsonl"))
+    first, second = numbers[:CLEAN_BATCH_SIZE], numbers[CLEAN_BATCH_SIZE:]
+    # Batches stay in order so the corpus streams, but each is permuted
+    assert sorted(first) == list(range(CLEAN_BATCH_SIZE))
+    assert sorted(second) == list(range(CLEAN_BATCH_SIZE, n_clean))
+    assert first != sorted(first) and second != sorted(second)
+
+
+def test_parquet_matches_the_corpus_schema(tmp_path, monkeypatch):
+    if seed_generator.pq is None:
+        pytest.skip("pyarrow is not installed")
+    monkeypatch.setattr(seed_generator, "PARQUET_ROW_GROUP_SIZE", 100)
+    output_file = SeedGenerator(output_dir=tmp_path).generate(250, 1, fmt="parquet")
+    
+    parquet_file = seed_generator.pq.ParquetFile(output_file)
+    assert parquet_file.schema_arrow.equals(seed_generator._parquet_schema())
+    assert parquet_file.metadata.num_row_groups == 3
+
+
+def test_unknown_format_is_rejected_before_writing(tmp_path):
+    with pytest.raises(ValueError, match="csv"):
+        SeedGenerator(output_dir=tmp_path).generate(10, 1, fmt="csv")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,100 @@
+"""Tests for the streaming statistics behind the analyzer reports"""
+import numpy as np
+import pytest
+
+from src.rag.detectors import statistical_analyzer
+from src.rag.detectors.statistical_analyzer import (
+    METRIC_TYPES, PERCENTILES, WARMUP_SIZE, P2Quantile, RunningStats, StatisticalAnalyzer)
+
+
+@pytest.fixture(params=["p2", "tdigest"])
+def percentile_backend(request, monkeypatch):
+    """Build RunningStats on P-square estimators or on crick's t-digest"""
+    if request.param == "tdigest" and statistical_analyzer.TDigest is None:
+        pytest.skip("crick is not installed")
+    if request.param == "p2":
+        monkeypatch.setattr(statistical_analyzer, "TDigest", None)
+    return request.param
+
+
+def _running(values) -> RunningStats:
+    running = RunningStats()
+    for value in values:
+        running.update(value)
+    return running
+
+
+def _percentiles(summary):
+    return [summary[f"p{p}"] for p in PERCENTILES]
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 4, 5])
+@pytest.mark.parametrize("p", PERCENTILES)
+def test_p2_quantile_is_exact_for_five_values_or_fewer(n, p):
+    values = np.random.default_rng(n).normal(size=n)
+    estimator = P2Quantile(p / 100)
+    for value in values.tolist():
+        estimator.update(value)
+    assert estimator.value() == pytest.approx(np.percentile(values, p), abs=1e-12)
+
+
+@pytest.mark.parametrize("p", PERCENTILES)
+def test_p2_quantile_tracks_numpy_on_large_samples(p):
+    values = np.random.default_rng(0).normal(size=10_000)
+    estimator = P2Quantile(p / 100)
+    for value in values.tolist():
+        estimator.update(value)
+    assert estimator.value() == pytest.approx(np.percentile(values, p), abs=0.05 * values.std())
+
+
+def test_p2_quantile_reports_zero_before_any_value():
+    assert P2Quantile(0.5).value() == 0.0
+
+
+def test_warmup_percentiles_are_exact(percentile_backend):
+    values = np.random.default_rng(1).exponential(size=WARMUP_SIZE)
+    summary = _running(values.tolist()).summary()
+    
+    assert summary["count"] == WARMUP_SIZE
+    assert _percentiles(summary) == pytest.approx(np.percentile(values, PERCENTILES), abs=1e-12)
+    assert summary["mean"] == pytest.approx(values.mean())
+    assert summary["stdev"] == pytest.approx(values.std(ddof=1))
+    assert (summary["min"], summary["max"]) == (values.min(), values.max())
+
+
+def test_warmup_hands_off_to_streaming_estimates(percentile_backend):
+    values = np.random.default_rng(2).normal(size=WARMUP_SIZE + 1)
+    running = _running(values.tolist())
+    assert running.warmup == []
+    
+    if running.digest is not None:
+        expected = running.digest.quantile(np.array(PERCENTILES) / 100).tolist()
+    else:
+        expected = [estimator.value() for estimator in running.quantiles.values()]
+    summary = running.summary()
+    assert _percentiles(summary) == expected
+    assert summary["median"] == summary["p50"]
+    assert _percentiles(summary) == pytest.approx(
+        np.percentile(values, PERCENTILES), abs=0.5 * values.std())
+
+
+def test_running_summary_keeps_the_exact_report_shape():
+    values = [45.2, 38.7, 52.1, 41.3, 39.8, 48.5, 42.7, 36.9, 44.1, 40.5]
+    summary = _running(values).summary()
+    exact = StatisticalAnalyzer().calculate_statistics(values)
+    
+    assert summary.keys() == exact.keys()
+    assert summary["mode"] is None
+    assert summary["outliers"] == []
+
+
+def test_default_analyzer_reports_without_raw_buffers():
+    analyzer = StatisticalAnalyzer()
+    for value in range(10):
+        analyzer.add_metric("drift_scores", float(value))
+    
+    assert set(analyzer.metrics_buffer) == set(METRIC_TYPES)
+    assert len(analyzer.metrics_buffer["drift_scores"]) == 0
+    metrics = analyzer.generate_full_report()["metrics"]
+    assert list(metrics) == ["drift_scores"]
+    assert metrics["drift_scores"]["count"] == 10
@@ -0,0 +1,210 @@
+"""Tests for the JSONL document store shared by the attack scenarios"""
+import json
+import os
+import shutil
+
+import numpy as np
+
+from src.rag.experiments import runner
+from src.rag.experiments.scenarios import store
+
+
+def _write_docs(path, docs, trailing_newline=True):
+    text = "\n".join(json.dumps(doc) for doc in docs)
+    (path / store.DOCS_FILE).write_text(text + "\n" if trailing_newline and docs else text)
+
+
+def _docs(prefix, n):
+    return [{"id": f"{prefix}{i}", "content": "x" * i, "meta": {"type": "clean"}} for i in range(n)]
+
+
+def _expected_offsets(path):
+    offsets, pos = [], 0
+    with open(path / store.DOCS_FILE, "rb") as f:
+        for line in f:
+            if line.strip():
+                offsets.append(pos)
+            pos += len(line)
+    return offsets
+
+
+def _sample_ids(path, count, accept=None):
+    return sorted(d["id"] for d in store.sample_docs(path, count, np.random.default_rng(0), accept))
+
+
+def test_current_index_is_reused(tmp_path):
+    _write_docs(tmp_path, _docs("d", 10))
+    store.load_index(tmp_path)
+    built = store.index_path(tmp_path).stat().st_ino
+    
+    assert store.load_index(tmp_path).tolist() == _expected_offsets(tmp_path)
+    assert store.index_path(tmp_path).stat().st_ino == built
+
+
+def test_index_rebuilt_after_docs_grow(tmp_path):
+    _write_docs(tmp_path, _docs("d", 5))
+    assert len(store.load_index(tmp_path)) == 5
+    
+    with open(tmp_path / store.DOCS_FILE, "a") as f:
+        f.write(json.dumps({"id": "late", "content": "", "meta": {}}) + "\n")
+    
+    assert store.load_index(tmp_path).tolist() == _expected_offsets(tmp_path)
+    assert "late" in _sample_ids(tmp_path, 10)
+
+
+def test_index_rebuilt_after_restoring_an_older_copy(tmp_path):
+    backup = tmp_path / "backup"
+    backup.mkdir()
+    _write_docs(backup, _docs("old", 3))
+    old = os.stat(backup / store.DOCS_FILE).st_mtime_ns - 3600 * 10**9
+    os.utime(backup / store.DOCS_FILE, ns=(old, old))
+    
+    _write_docs(tmp_path, _docs("new", 8))
+    store.load_index(tmp_path)
+    # cp -p / rsync -t style restore: the copy keeps its older mtime
+    shutil.copy2(backup / store.DOCS_FILE, tmp_path / store.DOCS_FILE)
+    assert os.stat(tmp_path / store.DOCS_FILE).st_mtime_ns < store.index_path(tmp_path).stat().st_mtime_ns
+    
+    assert store.load_index(tmp_path).tolist() == _expected_offsets(tmp_path)
+    assert _sample_ids(tmp_path, 10) == ["old0", "old1", "old2"]
+
+
+def test_index_rebuilt_when_last_offset_no_longer_starts_a_line(tmp_path):
+    docs_file = tmp_path / store.DOCS_FILE
+    docs_file.write_bytes(b'{"id": "long", "v": 1}\n{"id": "s"}\n')
+    store.load_index(tmp_path)
+    st = docs_file.stat()
+    
+    # Same size and mtime, but the short record now comes first
+    docs_file.write_bytes(b'{"id": "s"}\n{"id": "long", "v": 1}\n')
+    os.utime(docs_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert docs_file.stat().st_size == st.st_size
+    
+    assert store.load_index(tmp_path).tolist() == [0, 12]
+    assert _sample_ids(tmp_path, 2) == ["long", "s"]
+
+
+def test_index_of_file_without_trailing_newline(tmp_path):
+    _write_docs(tmp_path, _docs("d", 4), trailing_newline=False)
+    
+    assert store.load_index(tmp_path).tolist() == _expected_offsets(tmp_path)
+    assert _sample_ids(tmp_path, 10) == ["d0", "d1", "d2", "d3"]
+
+
+def test_empty_store(tmp_path):
+    (tmp_path / store.DOCS_FILE).write_bytes(b"")
+    
+    assert len(store.load_index(tmp_path)) == 0
+    assert store.index_path(tmp_path).stat().st_size == store._INDEX_HEADER_BYTES
+    assert store.sample_docs(tmp_path, 3, np.random.default_rng(0)) == []
+    assert len(store.load_index(tmp_path)) == 0
+
+
+def test_headerless_legacy_index_is_rebuilt(tmp_path):
+    _write_docs(tmp_path, _docs("d", 6))
+    # Earlier builds wrote bare offsets with no header
+    store.index_path(tmp_path).write_bytes(
+        np.array(_expected_offsets(tmp_path), dtype=np.int64).tobytes())
+    
+    assert store.load_index(tmp_path).tolist() == _expected_offsets(tmp_path)
+    assert store.index_path(tmp_path).stat().st_size == store._INDEX_HEADER_BYTES + 6 * 8
+
+
+def test_sample_with_filter_returns_every_match_when_too_few_qualify(tmp_path):
+    _write_docs(tmp_path, _docs("d", 20))
+    
+    def accept(doc):
+        return doc["id"] in {"d3", "d11", "d17"}
+    
+    assert _sample_ids(tmp_path, 5, accept) == ["d11", "d17", "d3"]
+    assert set(_sample_ids(tmp_path, 2, accept)) < {"d11", "d17", "d3"}
+
+
+def test_later_patches_win_field_by_field(tmp_path):
+    _write_docs(tmp_path, _docs("d", 3))
+    store.append_overrides(tmp_path, [{"id": "d1", "content": "first", "meta": {"v": 1}}])
+    store.append_overrides(tmp_path, [{"id": "d1", "meta": {"v": 2}}])
+    
+    assert store.load_overrides(tmp_path) == {"d1": {"id": "d1", "content": "first", "meta": {"v": 2}}}
+    docs = {d["id"]: d for d in store.load_docs(tmp_path)}
+    assert docs["d1"] == {"id": "d1", "content": "first", "meta": {"v": 2}}
+    assert docs["d0"] == _docs("d", 3)[0]
+
+
+def test_meta_patch_leaves_content_alone(tmp_path):
+    _write_docs(tmp_path, _docs("d", 3))
+    store.append_overrides(tmp_path, [{"id": "d2", "meta": {"experiment": "x"}}])
+    
+    patched = [d for d in store.load_docs(tmp_path) if d["id"] == "d2"][0]
+    assert patched == {"id": "d2", "content": "xx", "meta": {"experiment": "x"}}
+    sampled = store.sample_docs(tmp_path, 3, np.random.default_rng(0))
+    assert [d for d in sampled if d["id"] == "d2"] == [patched]
+
+
+def test_compact_copies_untouched_lines_verbatim(tmp_path):
+    # Hand-formatted lines that a re-serialization would not reproduce
+    untouched = [b'{"id":"a",  "content": "keep\\u00e9", "meta": {}}\n',
+                 b'{"content": "c", "id": "c", "meta": {"z": 1, "a": 2}}\n']
+    (tmp_path / store.DOCS_FILE).write_bytes(
+        untouched[0] + b'{"id": "b", "content": "old", "meta": {}}\n' + untouched[1])
+    store.load_index(tmp_path)
+    store.append_overrides(tmp_path, [{"id": "b", "content": "new"}])
+    before = store.load_docs(tmp_path)
+    
+    store.compact(tmp_path)
+    
+    lines = (tmp_path / store.DOCS_FILE).read_bytes().splitlines(keepends=True)
+    assert [lines[0], lines[2]] == untouched
+    assert json.loads(lines[1]) == {"id": "b", "content": "new", "meta": {}}
+    assert not store.overrides_path(tmp_path).exists()
+    assert not store.index_path(tmp_path).exists()
+    assert store.load_docs(tmp_path) == before
+
+
+def test_legacy_array_store_becomes_jsonl(tmp_path):
+    docs = _docs("d", 4)
+    (tmp_path / store.LEGACY_DOCS_FILE).write_text(json.dumps(docs))
+    assert store.docs_path(tmp_path).name == store.LEGACY_DOCS_FILE
+    store.append_overrides(tmp_path, [{"id": "d0", "meta": {"experiment": "x"}}])
+    expected = [{**docs[0], "meta": {"experiment": "x"}}] + docs[1:]
+    assert store.load_docs(tmp_path) == expected
+    
+    store.compact(tmp_path)
+    
+    assert store.docs_path(tmp_path).name == store.DOCS_FILE
+    assert not (tmp_path / store.LEGACY_DOCS_FILE).exists()
+    assert not store.overrides_path(tmp_path).exists()
+    assert store.load_docs(tmp_path) == expected
+
+
+def test_save_docs_replaces_legacy_store(tmp_path):
+    (tmp_path / store.LEGACY_DOCS_FILE).write_text(json.dumps(_docs("old", 2)))
+    store.append_overrides(tmp_path, [{"id": "old0", "content": "patched"}])
+    
+    store.save_docs(tmp_path, _docs("d", 3))
+    
+    assert sorted(p.name for p in tmp_path.iterdir()) == [store.DOCS_FILE]
+    assert store.load_docs(tmp_path) == _docs("d", 3)
+
+
+def test_run_all_appends_every_touched_document_once(tmp_path, monkeypatch):
+    monkeypatch.setenv(store.SEED_ENV, "7")
+    _write_docs(tmp_path, _docs("d", 40))
+    appends = []
+    original = store.append_overrides
+    
+    def recording_append(store_path, docs):
+        appends.append([d["id"] for d in docs])
+        original(store_path, docs)
+    
+    monkeypatch.setattr(runner.store, "append_overrides", recording_append)
+    # Each run loads the scenario afresh, so it binds the recording function too
+    results = runner.run_all(store_path=str(tmp_path), count=3)
+    
+    touched = {doc_id for ids in results.values() for doc_id in ids}
+    assert list(results) == runner.available_scenarios()
+    assert len(appends) == 1
+    assert sorted(appends[0]) == sorted(touched)
+    assert set(store.load_overrides(tmp_path)) == touched
+    patched = {d["id"]: d for d in store.load_docs(tmp_path) if d["id"] in touched}
+    assert all(d["meta"].get("experiment") for d in patched.values())
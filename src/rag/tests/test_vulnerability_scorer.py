@@ -0,0 +1,36 @@
+"""Tests for the CVSS-style vulnerability scoring"""
+import itertools
+from dataclasses import fields
+
+import numpy as np
+
+from tools.vulnerability_scorer import VulnerabilityScore
+
+# Every combination of metric values, as score_batch finding dicts
+FIELD_NAMES = [f.name for f in fields(VulnerabilityScore)]
+ALL_FINDINGS = [
+    dict(zip(FIELD_NAMES, members))
+    for members in itertools.product(*(list(f.type) for f in fields(VulnerabilityScore)))
+]
+
+
+def test_batch_matches_scalar_score_for_every_combination():
+    scores = VulnerabilityScore.score_batch(ALL_FINDINGS)
+    
+    assert len(scores) == len(ALL_FINDINGS) == 2592
+    for i, finding in enumerate(ALL_FINDINGS):
+        assert scores[i] == VulnerabilityScore(**finding).calculate_base_score(), finding
+
+
+def test_batch_accepts_score_instances():
+    instances = [VulnerabilityScore(**finding) for finding in ALL_FINDINGS[::7]]
+    
+    expected = [score.calculate_base_score() for score in instances]
+    assert VulnerabilityScore.score_batch(instances).tolist() == expected
+
+
+def test_batch_of_no_findings_is_empty():
+    scores = VulnerabilityScore.score_batch([])
+    
+    assert isinstance(scores, np.ndarray)
+    assert scores.shape == (0,)
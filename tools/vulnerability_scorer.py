@@ -7,7 +7,9 @@ Calculates CVSS-style scores for RAG-specific vulnerabilities
 import json
 from enum import Enum
 from typing import Dict, List
-from dataclimport dataclass
+from dataclasses import dataclass
+
+import numpy as np
 
 class AttackVector(Enum):
     NETWORK = ("N", 0.85)
@@ -37,9 +39,9 @@ class Impact(Enum):
     LOW = ("L", 0.22)
     HIGH = ("H", 0.56)
 
-@dataclass
+@dataclass(frozen=True)
 class VulnerabilityScore:
-    """CVSS-style vulnerability score"""
+    """CVSS-style vulnerability score, immutable so the cached weights stay valid"""
     attack_vector: AttackVector
     attack_complexity: AttackComplexity
     privileges_required: PrivilegesRequired
@@ -49,36 +51,78 @@ class VulnerabilityScore:
     integrity: Impact
     availability: Impact
     
+    def __post_init__(self):
+        # Cache metric weights as plain floats; the enums stay for the vector string.
+        # The instance is frozen, so the cache is written past the dataclass guard
+        weights = {
+            "_av": self.attack_vector.value[1],
+            "_ac": self.attack_complexity.value[1],
+            "_pr": self.privileges_required.value[1],
+            "_ui": self.user_interaction.value[1],
+            "_c": self.confidentiality.value[1],
+            "_i": self.integrity.value[1],
+            "_a": self.availability.value[1],
+            "_scope_changed": self.scope == Scope.CHANGED,
+        }
+        for name, value in weights.items():
+            object.__setattr__(self, name, value)
+    
     def calculate_base_score(self) -> float:
         """Calculate CVSS base score (0-10)"""
         # Impact Sub-Score
-        isc_base = 1 - ((1 - self.confidentiality.value[1]) * 
-                       (1 - self.integrity.value[1]) * 
-                       (1 - self.availability.value[1]))
+        isc_base = 1 - ((1 - self._c) * (1 - self._i) * (1 - self._a))
         
-        if self.scope == Scope.UNCHANGED:
+        if not self._scope_changed:
             impact = 6.42 * isc_base
         else:
             impact = 7.52 * (isc_base - 0.029) - 3.25 * pow(isc_base - 0.02, 15)
         
         # Exploitability Sub-Score
-        exploitability = (8.22 * 
-                         self.attack_vector.value[1] * 
-                         self.attack_complexity.value[1] * 
-                         self.privileges_required.value[1] * 
-                         self.user_interaction.value[1])
+        exploitability = 8.22 * self._av * self._ac * self._pr * self._ui
         
         # Base Score
         if impact <= 0:
             return 0.0
         
-        if self.scope == Scope.UNCHANGED:
+        if not self._scope_changed:
             base_score = min(impact + exploitability, 10.0)
         else:
             base_score = min(1.08 * (impact + exploitability), 10.0)
         
         return round(base_score, 1)
     
+    @classmethod
+    def score_batch(cls, findings: List[Dict]) -> np.ndarray:
+        """
+        Calculate CVSS base scores for many findings at once
+        
+        Args:
+            findings: Dicts mapping VulnerabilityScore field names to their
+                enum members (VulnerabilityScore instances also work)
+        
+        Returns:
+            Array of base scores, equal to calculate_base_score per finding
+        """
+        def column(name: str) -> list:
+            return [f[name] if isinstance(f, dict) else getattr(f, name) for f in findings]
+        
+        def metric(name: str) -> np.ndarray:
+            return np.array([m.value[1] for m in column(name)], dtype=np.float64)
+        
+        av, ac, pr, ui = (metric("attack_vector"), metric("attack_complexity"),
+                          metric("privileges_required"), metric("user_interaction"))
+        conf, integ, avail = metric("confidentiality"), metric("integrity"), metric("availability")
+        changed = np.array([s == Scope.CHANGED for s in column("scope")], dtype=bool)
+        
+        isc_base = 1 - (1 - conf) * (1 - integ) * (1 - avail)
+        impact = np.where(changed,
+                          7.52 * (isc_base - 0.029) - 3.25 * np.power(isc_base - 0.02, 15),
+                          6.42 * isc_base)
+        exploitability = 8.22 * av * ac * pr * ui
+        base_score = np.minimum(np.where(changed, 1.08, 1.0) * (impact + exploitability), 10.0)
+        
+        return np.where(impact <= 0, 0.0, np.round(base_score, 1))
+    
     def get_severity(self) -> str:
         """Get severity rating"""
         score = self.calculate_base_score()